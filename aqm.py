@@ -0,0 +1,225 @@
+# File: aqm.py
+import math
+import random
+from collections import deque
+
+class QueuePolicy:
+    """
+    Base class for a queue limit / Active Queue Management (AQM) policy.
+
+    A router makes one private copy (clone) per queue, so a policy object
+    passed to a router acts as a template. clone() is a plain constructor
+    call on parameters() (queues come and go per flow, so it must be
+    cheap); subclasses with more arguments extend parameters().
+    admit() runs when a packet is enqueued; should_drop() runs when a
+    packet reaches the head and is about to be sent.
+    Every policy also enforces the hard 'max_packets' / 'max_bytes' limits.
+    """
+    def __init__(self, max_packets=None, max_bytes=None):
+        self.max_packets = max_packets
+        self.max_bytes = max_bytes
+
+    def parameters(self):
+        return {'max_packets': self.max_packets, 'max_bytes': self.max_bytes}
+
+    def clone(self):
+        return type(self)(**self.parameters())
+
+    def release(self, now):
+        """
+        Called when a router deletes this policy's emptied queue. Returns
+        the time until which the policy's state still matters; if the
+        queue comes back before then the router reuses this policy,
+        otherwise it starts from a fresh clone(). Stateless by default.
+        """
+        return now
+
+    def is_full(self, queue, packet):
+        return ((self.max_packets is not None and len(queue) >= self.max_packets) or
+                (self.max_bytes is not None and queue.bytes + packet.size_bytes > self.max_bytes))
+
+    def admit(self, queue, packet, now):
+        return not self.is_full(queue, packet)
+
+    def should_drop(self, queue, packet, sojourn_sec, now):
+        return False
+
+class TailDrop(QueuePolicy):
+    """Drops arriving packets once the queue hits its packet/byte limit."""
+
+class RED(QueuePolicy):
+    """
+    Random Early Detection.
+
+    Keeps an EWMA of the queue length (in packets) and drops arrivals with
+    a probability that rises linearly from 0 at 'min_threshold' to 'max_p'
+    at 'max_threshold'; above that everything is dropped.
+    Each clone gets its own seed (template seed / clone number), so queues
+    do not drop in lockstep; the generator is only built on first use.
+    After a router reclaims an idle queue the average decays as if
+    'idle_packet_sec'-long packets had arrived to an empty queue.
+    """
+    FORGET_AVERAGE = 0.01   # An average this small is as good as a fresh start
+
+    def __init__(self, min_threshold=20, max_threshold=60, max_p=0.1, weight=0.002,
+                 max_packets=None, max_bytes=None, seed=0, idle_packet_sec=0.001):
+        super().__init__(max_packets, max_bytes)
+        self.min_threshold = min_threshold
+        self.max_threshold = max_threshold
+        self.max_p = max_p
+        self.weight = weight
+        self.average = 0.0
+        self.count = -1   # Packets admitted since the last random drop
+        self.seed = seed
+        self.idle_packet_sec = idle_packet_sec
+        self.idle_since = None
+        self.clones = 0
+        self._rng = None
+
+    @property
+    def rng(self):
+        if self._rng is None:
+            self._rng = random.Random(self.seed)
+        return self._rng
+
+    def parameters(self):
+        return dict(super().parameters(), min_threshold=self.min_threshold,
+                    max_threshold=self.max_threshold, max_p=self.max_p,
+                    weight=self.weight, seed=self.seed, idle_packet_sec=self.idle_packet_sec)
+
+    def clone(self):
+        policy = super().clone()
+        self.clones += 1
+        if self.seed is not None:
+            policy.seed = f'{self.seed}/{self.clones}'
+        return policy
+
+    def release(self, now):
+        self.idle_since = now
+        if self.average <= self.FORGET_AVERAGE:
+            return now
+        idle_packets = math.log(self.FORGET_AVERAGE / self.average) / math.log1p(-self.weight)
+        return now + idle_packets * self.idle_packet_sec
+
+    def admit(self, queue, packet, now):
+        if self.is_full(queue, packet):
+            return False
+        if self.idle_since is not None:
+            self.average *= (1 - self.weight) ** ((now - self.idle_since) / self.idle_packet_sec)
+            self.idle_since = None
+        self.average += self.weight * (len(queue) - self.average)
+        if self.average < self.min_threshold:
+            self.count = -1
+            return True
+        if self.average >= self.max_threshold:
+            self.count = 0
+            return False
+        self.count += 1
+        p_b = self.max_p * (self.average - self.min_threshold) / (self.max_threshold - self.min_threshold)
+        p_a = p_b / max(1e-9, 1 - self.count * p_b)
+        if self.rng.random() < p_a:
+            self.count = 0
+            return False
+        return True
+
+class CoDel(QueuePolicy):
+    """
+    Controlled Delay (RFC 8289).
+
+    Drops at the head when packets have waited longer than 'target_sec'
+    for at least 'interval_sec'. While in the dropping state, the gap
+    between drops shrinks with 1/sqrt(count). The last packet of a queue
+    is never dropped.
+    """
+    def __init__(self, target_sec=0.005, interval_sec=0.1, max_packets=None, max_bytes=None):
+        super().__init__(max_packets, max_bytes)
+        self.target_sec = target_sec
+        self.interval_sec = interval_sec
+        self.first_above_time = 0.0
+        self.drop_next = 0.0
+        self.count = 0
+        self.last_count = 0
+        self.dropping = False
+
+    def parameters(self):
+        return dict(super().parameters(), target_sec=self.target_sec, interval_sec=self.interval_sec)
+
+    def release(self, now):
+        # An emptied queue has left the dropping state; only the drop count
+        # is remembered, and only while the next episode counts as 'recent'
+        if self.count == 0:
+            return now
+        return self.drop_next + 16 * self.interval_sec
+
+    def _control_law(self, t):
+        return t + self.interval_sec / math.sqrt(self.count)
+
+    def should_drop(self, queue, packet, sojourn_sec, now):
+        ok_to_drop = False
+        if sojourn_sec < self.target_sec or not queue:
+            self.first_above_time = 0.0
+        elif self.first_above_time == 0.0:
+            self.first_above_time = now + self.interval_sec
+        elif now >= self.first_above_time:
+            ok_to_drop = True
+
+        if self.dropping:
+            if not ok_to_drop:
+                self.dropping = False
+            elif now >= self.drop_next:
+                self.count += 1
+                self.drop_next = self._control_law(self.drop_next)
+                return True
+            return False
+        if ok_to_drop:
+            self.dropping = True
+            delta = self.count - self.last_count
+            recent = now - self.drop_next < 16 * self.interval_sec
+            self.count = delta if delta > 1 and recent else 1
+            self.last_count = self.count
+            self.drop_next = self._control_law(now)
+            return True
+        return False
+
+class BoundedQueue:
+    """
+    A deque-like packet queue governed by a QueuePolicy.
+
+    Supports what the routers use: append, popleft, len, [0] and truth.
+    Dropped packets are reported to router._drop(packet, queued).
+    """
+    def __init__(self, policy, router):
+        self.policy = policy
+        self.router = router
+        self.packets = deque()
+        self.enqueue_times = deque()
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self.packets)
+
+    def __bool__(self):
+        return bool(self.packets)
+
+    def __getitem__(self, index):
+        return self.packets[index]
+
+    def append(self, packet):
+        now = self.router.clock()
+        if not self.policy.admit(self, packet, now):
+            self.router._drop(packet, False)
+            return
+        self.packets.append(packet)
+        self.enqueue_times.append(now)
+        self.bytes += packet.size_bytes
+
+    def popleft(self):
+        now = self.router.clock()
+        while True:
+            packet = self.packets.popleft()
+            sojourn_sec = now - self.enqueue_times.popleft()
+            self.bytes -= packet.size_bytes
+            if self.policy.should_drop(self, packet, sojourn_sec, now) and self.packets:
+                self.router._drop(packet, True)
+                continue
+            return packet
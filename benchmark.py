@@ -0,0 +1,151 @@
+# File: benchmark.py
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from flow import VideoStream, FileDownload, spawn_generators
+from main import run_simulation
+from packet import Packet, PacketBatch
+from router import FIFORouter, PQRouter, WFQRouter, WF2QRouter, DRRRouter, by_flow_index
+from statistics import StatisticsCollector
+
+# Each benchmark is a function that takes (packets, flows) and returns a
+# zero-argument callable; calling it once runs the timed work and returns
+# the number of packets it handled.
+
+def _video_flows(flows):
+    # 'flows' video streams of 5 Mbps each
+    return [VideoStream(f"video_{i}", 5, 1200) for i in range(flows)]
+
+def _duration_for(packets, flows):
+    # One 5 Mbps / 1200-byte stream sends ~520.8 packets per second
+    return packets / (flows * 5_000_000 / 8 / 1200)
+
+def bench_video_generate(packets, flows):
+    streams = _video_flows(flows)
+    duration = _duration_for(packets, flows)
+    def run():
+        return sum(len(s.generate_packets(duration, i)) for i, s in enumerate(streams))
+    return run
+
+def bench_download_generate(packets, flows):
+    # 'packets' spread over 'flows' downloads of one packet per ~1.25 ms
+    duration = packets / flows * 0.00125
+    downloads = [FileDownload(f"download_{i}", 0, duration, 1500, 0.001, rng=rng)
+                 for i, rng in enumerate(spawn_generators(0, flows))]
+    def run():
+        return sum(len(d.generate_packets(duration, i)) for i, d in enumerate(downloads))
+    return run
+
+def _router_packets(packets, flows):
+    # Alternate flow types so PQ/WFQ see both of their queues
+    return [Packet(i, 'VIDEO' if i % 2 else 'DOWNLOAD', 1200 if i % 2 else 1500, 0.0, i % flows)
+            for i in range(packets)]
+
+def _bench_router(make_router):
+    def bench(packets, flows):
+        queued = _router_packets(packets, flows)
+        def run():
+            router = make_router()
+            for packet in queued:
+                router.add_packet(packet)
+            sent = 0
+            while router.get_next_packet() is not None:
+                sent += 1
+            return sent
+        return run
+    return bench
+
+def bench_run_simulation(make_router):
+    def bench(packets, flows):
+        duration = _duration_for(packets, flows)
+        all_packets = PacketBatch.concatenate(
+            [s.generate_packets(duration, i) for i, s in enumerate(_video_flows(flows))]).sorted()
+        # Just enough bandwidth to keep the link ~90% busy
+        link_bps = flows * 5_000_000 / 8 / 0.9
+        def run():
+            run_simulation(make_router(), StatisticsCollector(), all_packets, link_bps)
+            return len(all_packets)
+        return run
+    return bench
+
+def _per_flow(router_class):
+    return lambda: router_class(classify=by_flow_index)
+
+BENCHMARKS = {
+    'generate.VideoStream': bench_video_generate,
+    'generate.FileDownload': bench_download_generate,
+    'router.FIFORouter': _bench_router(FIFORouter),
+    'router.PQRouter': _bench_router(PQRouter),
+    'router.WFQRouter': _bench_router(WFQRouter),
+    'router.WF2QRouter': _bench_router(_per_flow(WF2QRouter)),
+    'router.DRRRouter': _bench_router(_per_flow(DRRRouter)),
+    'simulation.FIFORouter': bench_run_simulation(FIFORouter),
+    'simulation.PQRouter': bench_run_simulation(PQRouter),
+    'simulation.WFQRouter': bench_run_simulation(WFQRouter),
+}
+
+def measure(bench, packets, flows, repeat):
+    """Best-of-'repeat' wall time, then one extra run under tracemalloc for peak memory."""
+    best = float('inf')
+    handled = 0
+    for _ in range(repeat):
+        run = bench(packets, flows)
+        start = time.perf_counter()
+        handled = run()
+        best = min(best, time.perf_counter() - start)
+
+    run = bench(packets, flows)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'packets': handled,
+        'seconds': best,
+        'packets_per_sec': handled / best if best > 0 else None,
+        'peak_memory_bytes': peak,
+    }
+
+def run_benchmarks(names, packet_counts, flow_counts, repeat=3):
+    results = []
+    for name in names:
+        for flows in flow_counts:
+            for packets in packet_counts:
+                row = {'benchmark': name, 'target_packets': packets, 'flows': flows}
+                row.update(measure(BENCHMARKS[name], packets, flows, repeat))
+                results.append(row)
+                print(f"{name:<24} flows={flows:<6} packets={row['packets']:<9} "
+                      f"{row['packets_per_sec']:>14,.0f} pkt/s  "
+                      f"{row['peak_memory_bytes'] / 1e6:>8.1f} MB", file=sys.stderr)
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark generators, routers and the simulation loop.")
+    parser.add_argument('--only', nargs='+', default=list(BENCHMARKS), choices=list(BENCHMARKS),
+                        help="Benchmarks to run (default: all)")
+    parser.add_argument('--packets', nargs='+', type=int, default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--flows', nargs='+', type=int, default=[2, 64, 1024])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.only, args.packets, args.flows, args.repeat)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
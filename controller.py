@@ -0,0 +1,110 @@
+# File: controller.py
+
+class WindowedLatency:
+    """
+    Mean latency of one class since the previous read.
+
+    Differences the per-class running packet count and latency sum that
+    StatisticsCollector keeps, so a read is O(1): it does not depend on
+    the number of flows or packets.
+    """
+    def __init__(self, stats_collector, flow_type='VIDEO'):
+        self.stats_collector = stats_collector
+        self.flow_type = flow_type
+        self._count = 0
+        self._total_ms = 0.0
+
+    def read(self):
+        """Returns the window's mean latency in ms, or None if no packets left."""
+        count, total_ms = self.stats_collector.class_totals.get(self.flow_type, (0, 0.0))
+        window_count = count - self._count
+        window_total = total_ms - self._total_ms
+        self._count, self._total_ms = count, total_ms
+        if window_count <= 0:
+            return None
+        return window_total / window_count
+
+# --- Policies ---
+# A policy turns (window latency, queue depths, tick length) into the
+# share of bandwidth for video (0..1), or None to leave the weights alone.
+
+class ThresholdPolicy:
+    """
+    The dashboard's "Adaptive-ML" rule, on real measurements:
+    - no congestion (every queue at or below 'congestion_depth'): 'normal_share'
+    - congested and latency > 'threshold_ms': 'boost_share'
+    - congested otherwise: 'congested_share'
+    """
+    def __init__(self, threshold_ms=4.0, normal_share=0.6, congested_share=0.75,
+                 boost_share=0.95, congestion_depth=10):
+        self.threshold_ms = threshold_ms
+        self.normal_share = normal_share
+        self.congested_share = congested_share
+        self.boost_share = boost_share
+        self.congestion_depth = congestion_depth
+
+    def decide(self, latency_ms, queue_depths, dt):
+        if max(queue_depths.values(), default=0) <= self.congestion_depth:
+            return self.normal_share
+        if latency_ms is not None and latency_ms > self.threshold_ms:
+            return self.boost_share
+        return self.congested_share
+
+class PIDPolicy:
+    """Steers the video share so the window latency tracks 'target_ms'."""
+    def __init__(self, target_ms=3.0, kp=0.05, ki=0.02, kd=0.0,
+                 base_share=0.6, min_share=0.1, max_share=0.95):
+        self.target_ms = target_ms
+        self.kp, self.ki, self.kd = kp, ki, kd
+        self.base_share = base_share
+        self.min_share = min_share
+        self.max_share = max_share
+        self.integral = 0.0
+        self.last_error = None
+
+    def decide(self, latency_ms, queue_depths, dt):
+        if latency_ms is None:
+            return None
+        error = latency_ms - self.target_ms
+        derivative = 0.0 if self.last_error is None else (error - self.last_error) / dt
+        self.last_error = error
+        share = self.base_share + self.kp * error + self.ki * (self.integral + error * dt) + self.kd * derivative
+        if self.min_share < share < self.max_share:
+            # Only integrate while unsaturated (anti-windup)
+            self.integral += error * dt
+        return min(max(share, self.min_share), self.max_share)
+
+class AdaptiveController:
+    """
+    Retunes a router's VIDEO/DOWNLOAD weights on a periodic control tick.
+
+    Works with any router that has set_weight(key, weight) (WFQRouter,
+    WF2QRouter, DRRRouter). The video share from the policy is turned into
+    integer weights that add up to 'weight_scale'. Each tick costs O(1) in
+    the number of packets simulated.
+    Pass it to run_simulation(..., controllers=[...]).
+    """
+    def __init__(self, router, stats_collector, policy, interval_sec=0.1, weight_scale=20):
+        self.router = router
+        self.policy = policy
+        self.interval_sec = interval_sec
+        self.weight_scale = weight_scale
+        self.window = WindowedLatency(stats_collector, 'VIDEO')
+        self.history = []   # (time, window latency ms, video share) per tick
+        self.loop = None
+
+    def attach(self, loop):
+        self.loop = loop
+        loop.call_at(loop.now + self.interval_sec, self.tick)
+
+    def tick(self):
+        latency_ms = self.window.read()
+        share = self.policy.decide(latency_ms, self.router.queue_depths(), self.interval_sec)
+        if share is not None:
+            video_weight = min(max(1, round(share * self.weight_scale)), self.weight_scale - 1)
+            self.router.set_weight('VIDEO', video_weight)
+            self.router.set_weight('DOWNLOAD', self.weight_scale - video_weight)
+        self.history.append((self.loop.now, latency_ms, share))
+        # Stop ticking once the packets are done (other timers do not count)
+        if self.loop.has_work():
+            self.loop.call_at(self.loop.now + self.interval_sec, self.tick)
@@ -0,0 +1,139 @@
+# File: events.py
+import heapq
+from itertools import count
+
+# --- Event kinds ---
+# When two events share a timestamp the lower kind runs first.
+# So every packet arriving at time t is queued before a link
+# decides what to send at time t (same as the old polling loop).
+ARRIVAL = 0
+DEPARTURE = 1
+TIMER = 2
+
+class Sequence(count):
+    """
+    Tie-breaking counter: next() gives 0, 1, 2, ... like itertools.count,
+    which it extends only so it can be pickled (as its next value) with
+    a checkpointed EventLoop or router.
+    """
+    def __reduce__(self):
+        return type(self), (next(self),)
+
+def _invoke(callback):
+    callback()
+
+class EventLoop:
+    """
+    A heap-based discrete-event scheduler.
+
+    Events are (time, kind, sequence, handler, payload) tuples in a heap,
+    so scheduling and dispatching each cost O(log n).
+    An event calls its own 'handler' (if given) with the payload.
+    It also calls every handler registered for its kind with on().
+    Pending TIMER events are counted, so periodic timers can tell
+    (has_work) whether anything but other timers is left to run.
+    """
+    def __init__(self):
+        self.now = 0.0
+        self.handlers = {}
+        self._queue = []
+        self._sequence = Sequence()
+        self._timers = 0
+
+    def on(self, kind, handler):
+        """Registers 'handler(payload)' for every event of this kind."""
+        self.handlers.setdefault(kind, []).append(handler)
+
+    def schedule(self, time, kind, payload=None, handler=None):
+        if kind == TIMER:
+            self._timers += 1
+        heapq.heappush(self._queue, (time, kind, next(self._sequence), handler, payload))
+
+    def call_at(self, time, callback):
+        """Schedules a TIMER event that calls 'callback()' at 'time'."""
+        self.schedule(time, TIMER, callback, _invoke)
+
+    def clock(self):
+        return self.now
+
+    def has_events(self):
+        return len(self._queue) > 0
+
+    def has_work(self):
+        """True while arrivals or departures are pending (timers not counted)."""
+        return len(self._queue) > self._timers
+
+    def run(self, until=None):
+        """Dispatches events in time order until the queue is empty or 'until' is reached."""
+        queue = self._queue
+        handlers = self.handlers
+        pop = heapq.heappop
+        while queue and (until is None or queue[0][0] <= until):
+            time, kind, _, handler, payload = pop(queue)
+            self.now = time
+            if kind == TIMER:
+                self._timers -= 1
+            if handler is not None:
+                handler(payload)
+            if handlers:
+                for listener in handlers.get(kind, ()):
+                    listener(payload)
+        if until is not None:
+            self.now = max(self.now, until)
+
+class PacketSource:
+    """
+    Feeds an entry-ordered packet iterable (see PacketBatch.sorted) into the loop.
+    Only the next pending arrival is ever on the heap.
+    """
+    def __init__(self, loop, packets, deliver):
+        self.loop = loop
+        self.packets = iter(packets)
+        self.deliver = deliver
+        self._schedule_next()
+
+    def _schedule_next(self):
+        packet = next(self.packets, None)
+        if packet is not None:
+            # Shaped packets enter at their release time
+            time = packet.release_time_sec
+            if time is None:
+                time = packet.arrival_time_sec
+            self.loop.schedule(time, ARRIVAL, packet, self.arrive)
+
+    def arrive(self, packet):
+        self.deliver(packet)
+        self._schedule_next()
+
+class Link:
+    """
+    A link of fixed bandwidth fed by a Router.
+
+    Any Router plugs in unchanged: arrivals call add_packet() and every
+    time the wire goes free the link asks get_next_packet() for more.
+    'on_departure(packet, finish_time)' is called for each sent packet.
+    """
+    def __init__(self, loop, router, link_bps, on_departure):
+        self.loop = loop
+        self.router = router
+        self.link_bps = link_bps
+        self.on_departure = on_departure
+        self.busy = False
+        router.clock = loop.clock   # For time-aware queue policies (CoDel)
+
+    def receive(self, packet):
+        self.router.add_packet(packet)
+        if not self.busy:
+            # Start sending after all other arrivals at this instant are queued
+            self.busy = True
+            self.loop.schedule(self.loop.now, DEPARTURE, None, self.transmit_next)
+
+    def transmit_next(self, sent_packet):
+        if sent_packet is not None:
+            self.on_departure(sent_packet, self.loop.now)
+        packet = self.router.get_next_packet()
+        if packet is None:
+            self.busy = False
+            return
+        finish_time = self.loop.now + packet.size_bytes / self.link_bps
+        self.loop.schedule(finish_time, DEPARTURE, packet, self.transmit_next)
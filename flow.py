@@ -1,60 +1,309 @@
 # File: flow.py
-import random
-from packet import Packet
+import heapq
+import math
+from operator import attrgetter
+
+import numpy as np
+
+from packet import CLASS_CODES, CLASS_NAMES, Packet, PacketBatch
+
+def spawn_generators(seed, count):
+    """
+    'count' independent NumPy Generators derived from one scenario seed.
+    SeedSequence.spawn gives statistically independent streams, and the
+    same (seed, count) gives the same streams in every process.
+    """
+    return [np.random.default_rng(child) for child in np.random.SeedSequence(seed).spawn(count)]
 
 class Flow:
-    """Base class (template) for all traffic generators."""
-    def __init__(self, flow_id):
+    """
+    Base class (template) for all traffic generators.
+
+    'rng' is the flow's own numpy.random.Generator (or a seed for one);
+    random flows draw only from it, so a run is reproducible from its
+    seeds. Without one the flow is seeded from the OS.
+    """
+    def __init__(self, flow_id, rng=None):
         self.flow_id = flow_id
+        self.rng = np.random.default_rng(rng)
 
-    def generate_packets(self, simulation_time_sec):
-        """Must be implemented by subclasses."""
+    def generate_packets(self, simulation_time_sec, flow_index=0):
+        """
+        Must be implemented by subclasses.
+        Returns a PacketBatch whose rows are tagged with 'flow_index'.
+        """
         raise NotImplementedError
 
+    def iter_packets(self, simulation_time_sec, flow_index=0):
+        """
+        Lazily yields Packets in arrival order.
+        Subclasses override this to avoid building the whole batch first.
+        """
+        return iter(self.generate_packets(simulation_time_sec, flow_index))
+
 class VideoStream(Flow):
     """Generates a Constant Bit Rate (CBR) stream of packets."""
-    def __init__(self, flow_id, bitrate_mbps, packet_size_bytes):
-        super().__init__(flow_id)
+    def __init__(self, flow_id, bitrate_mbps, packet_size_bytes, rng=None):
+        super().__init__(flow_id, rng)
         self.bitrate_bps = (bitrate_mbps * 1_000_000) / 8
         self.packet_size_bytes = packet_size_bytes
         self.packet_interval_sec = self.packet_size_bytes / self.bitrate_bps
 
-    def generate_packets(self, simulation_time_sec):
-        packets = []
+    def generate_packets(self, simulation_time_sec, flow_index=0):
+        # CBR: a running sum of the packet interval. np.cumsum adds in the
+        # same order as the old per-packet loop, so the times match exactly.
+        count = math.ceil(simulation_time_sec / self.packet_interval_sec) + 1
+        steps = np.full(count, self.packet_interval_sec)
+        steps[0] = 0.0
+        arrivals = np.cumsum(steps)
+        arrivals = arrivals[arrivals < simulation_time_sec]
+        return PacketBatch.from_flow(arrivals, self.packet_size_bytes, flow_index, 'VIDEO')
+
+    def iter_packets(self, simulation_time_sec, flow_index=0):
         current_time = 0.0
         packet_count = 0
         while current_time < simulation_time_sec:
-            packets.append(Packet(
-                id=f"{self.flow_id}_{packet_count}",
-                flow_type='VIDEO',
-                size_bytes=self.packet_size_bytes,
-                arrival_time_sec=current_time
-            ))
+            yield Packet(packet_count, 'VIDEO', self.packet_size_bytes, current_time, flow_index)
             current_time += self.packet_interval_sec
             packet_count += 1
-        return packets
 
 class FileDownload(Flow):
     """Generates a "greedy" burst of traffic."""
-    def __init__(self, flow_id, start_time, end_time, packet_size_bytes, interval_sec):
-        super().__init__(flow_id)
+    JITTER_SEC = 0.0005     # Each gap is interval_sec plus up to this much
+    BLOCK = 4096            # Gaps drawn per RNG call in iter_packets
+
+    def __init__(self, flow_id, start_time, end_time, packet_size_bytes, interval_sec, rng=None):
+        super().__init__(flow_id, rng)
         self.start_time = start_time
         self.end_time = end_time
         self.packet_size_bytes = packet_size_bytes
         self.interval_sec = interval_sec
 
-    def generate_packets(self, simulation_time_sec):
-        packets = []
+    def _gaps(self, count):
+        # Add a little randomness (jitter)
+        return self.interval_sec + self.rng.random(count) * self.JITTER_SEC
+
+    def _arrivals(self, current_time, gaps):
+        """Running sum from 'current_time'; same addition order as a scalar loop."""
+        steps = np.empty(len(gaps) + 1)
+        steps[0] = current_time
+        steps[1:] = gaps
+        return np.cumsum(steps)
+
+    def generate_packets(self, simulation_time_sec, flow_index=0):
+        stop = min(self.end_time, simulation_time_sec)
+        # Gaps are never shorter than interval_sec, so this bounds the count
+        count = max(0, math.ceil((stop - self.start_time) / self.interval_sec) + 1)
+        arrivals = self._arrivals(self.start_time, self._gaps(count))
+        arrivals = arrivals[arrivals < stop]
+        return PacketBatch.from_flow(arrivals, self.packet_size_bytes, flow_index, 'DOWNLOAD')
+
+    def iter_packets(self, simulation_time_sec, flow_index=0):
+        stop = min(self.end_time, simulation_time_sec)
         current_time = self.start_time
         packet_count = 0
-        while current_time < self.end_time and current_time < simulation_time_sec:
-            packets.append(Packet(
-                id=f"{self.flow_id}_{packet_count}",
-                flow_type='DOWNLOAD',
-                size_bytes=self.packet_size_bytes,
-                arrival_time_sec=current_time
-            ))
-            # Add a little randomness (jitter)
-            current_time += self.interval_sec + (random.random() * 0.0005)
-            packet_count += 1
-        return packets
\ No newline at end of file
+        while current_time < stop:
+            arrivals = self._arrivals(current_time, self._gaps(self.BLOCK))
+            for arrival in arrivals[:-1].tolist():
+                if arrival >= stop:
+                    return
+                yield Packet(packet_count, 'DOWNLOAD', self.packet_size_bytes, arrival, flow_index)
+                packet_count += 1
+            current_time = arrivals[-1]
+
+# --- Stochastic traffic models ---
+# These build arrival/size arrays with NumPy, BLOCK draws at a time, in
+# arrival order. generate_packets joins the blocks; iter_packets turns one
+# block at a time into Packets, so merge_flows holds about BLOCK packets
+# per flow. 'flow_type' must be one of packet.CLASS_NAMES.
+
+def _renewal_blocks(start, stop, draw_gaps, block):
+    """
+    Event times start + g1, start + g1 + g2, ... below 'stop', as
+    (times, horizon) blocks of 'block' gaps; every later event comes at
+    or after 'horizon'.
+    """
+    current = start
+    while current < stop:
+        times = np.cumsum(np.r_[current, draw_gaps(block)])[1:]
+        current = times[-1]
+        yield times[times < stop], current
+
+def _burst_arrivals(starts, counts, spacing_sec):
+    """Expands bursts: 'counts[i]' packets from 'starts[i]', 'spacing_sec' apart."""
+    total = int(counts.sum())
+    first = np.cumsum(counts) - counts
+    position = np.arange(total) - np.repeat(first, counts)
+    return np.repeat(starts, counts) + position * spacing_sec
+
+class _BlockFlow(Flow):
+    """Base of the stochastic flows: subclasses yield (arrivals, sizes) blocks from _blocks()."""
+    BLOCK = 4096
+
+    def __init__(self, flow_id, flow_type, rng=None):
+        super().__init__(flow_id, rng)
+        if flow_type not in CLASS_CODES:
+            raise ValueError(f"Unknown flow_type '{flow_type}'; expected one of {', '.join(CLASS_NAMES)}")
+        self.flow_type = flow_type
+
+    def _blocks(self, simulation_time_sec):
+        raise NotImplementedError
+
+    def generate_packets(self, simulation_time_sec, flow_index=0):
+        blocks = [(arrivals, np.broadcast_to(sizes, arrivals.shape))
+                  for arrivals, sizes in self._blocks(simulation_time_sec)]
+        if not blocks:
+            return PacketBatch.from_flow(np.empty(0), 0, flow_index, self.flow_type)
+        return PacketBatch.from_flow(np.concatenate([arrivals for arrivals, _ in blocks]),
+                                     np.concatenate([sizes for _, sizes in blocks]),
+                                     flow_index, self.flow_type)
+
+    def iter_packets(self, simulation_time_sec, flow_index=0):
+        packet_count = 0
+        for arrivals, sizes in self._blocks(simulation_time_sec):
+            sizes = np.broadcast_to(sizes, arrivals.shape).tolist()
+            for arrival, size in zip(arrivals.tolist(), sizes):
+                yield Packet(packet_count, self.flow_type, size, arrival, flow_index)
+                packet_count += 1
+
+class PoissonFlow(_BlockFlow):
+    """Poisson arrivals: exponential inter-arrival gaps at 'rate_pps' packets/second."""
+    def __init__(self, flow_id, rate_pps, packet_size_bytes, flow_type='DOWNLOAD',
+                 start_time=0.0, end_time=math.inf, rng=None):
+        super().__init__(flow_id, flow_type, rng)
+        self.rate_pps = rate_pps
+        self.packet_size_bytes = packet_size_bytes
+        self.start_time = start_time
+        self.end_time = end_time
+
+    def _blocks(self, simulation_time_sec):
+        stop = min(self.end_time, simulation_time_sec)
+        for arrivals, _ in _renewal_blocks(self.start_time, stop,
+                                           lambda n: self.rng.exponential(1.0 / self.rate_pps, n),
+                                           self.BLOCK):
+            yield arrivals, self.packet_size_bytes
+
+class OnOffFlow(_BlockFlow):
+    """
+    A two-state Markov (exponential on/off) source.
+
+    ON periods last 'mean_on_sec' on average and send back-to-back packets
+    at 'peak_mbps'; OFF periods last 'mean_off_sec' on average and are
+    silent. The first state is drawn from the stationary distribution.
+    """
+    def __init__(self, flow_id, peak_mbps, mean_on_sec, mean_off_sec, packet_size_bytes,
+                 flow_type='DOWNLOAD', rng=None):
+        super().__init__(flow_id, flow_type, rng)
+        self.spacing_sec = packet_size_bytes * 8 / (peak_mbps * 1_000_000)
+        self.mean_on_sec = mean_on_sec
+        self.mean_off_sec = mean_off_sec
+        self.packet_size_bytes = packet_size_bytes
+
+    def _blocks(self, simulation_time_sec):
+        cycle = self.mean_on_sec + self.mean_off_sec
+        # Start OFF with the stationary probability (durations are memoryless)
+        current = 0.0
+        if self.rng.random() >= self.mean_on_sec / cycle:
+            current = self.rng.exponential(self.mean_off_sec)
+        # About BLOCK packets per block of cycles
+        block = max(1, int(self.BLOCK * self.spacing_sec / self.mean_on_sec))
+        while current < simulation_time_sec:
+            # A block of ON/OFF cycles: each ON starts after the previous cycle,
+            # and ends before the next one starts, so blocks never overlap
+            on = self.rng.exponential(self.mean_on_sec, block)
+            off = self.rng.exponential(self.mean_off_sec, block)
+            starts = np.cumsum(np.r_[current, on + off])
+            current = starts[-1]
+            keep = starts[:-1] < simulation_time_sec
+            counts = np.ceil(on[keep] / self.spacing_sec).astype(np.int64)
+            arrivals = _burst_arrivals(starts[:-1][keep], counts, self.spacing_sec)
+            yield arrivals[arrivals < simulation_time_sec], self.packet_size_bytes
+
+class ParetoBurstFlow(_BlockFlow):
+    """
+    Heavy-tailed bursts: bursts start as a Poisson process (one per
+    'mean_gap_sec' on average) and each sends a Pareto-distributed number
+    of packets (shape 'alpha', at least 'min_packets') at 'peak_mbps'.
+    With alpha < 2 the burst size has infinite variance. Bursts may
+    overlap, so a long one is carried over into later blocks.
+    """
+    def __init__(self, flow_id, peak_mbps, mean_gap_sec, packet_size_bytes, alpha=1.5,
+                 min_packets=1, flow_type='DOWNLOAD', rng=None):
+        super().__init__(flow_id, flow_type, rng)
+        self.spacing_sec = packet_size_bytes * 8 / (peak_mbps * 1_000_000)
+        self.mean_gap_sec = mean_gap_sec
+        self.packet_size_bytes = packet_size_bytes
+        self.alpha = alpha
+        self.min_packets = min_packets
+
+    def _blocks(self, simulation_time_sec):
+        carried = np.empty(0)
+        for starts, horizon in _renewal_blocks(0.0, simulation_time_sec,
+                                               lambda n: self.rng.exponential(self.mean_gap_sec, n),
+                                               self.BLOCK):
+            # numpy's pareto() is Lomax (Pareto II); +1 gives classic Pareto with minimum 1
+            sizes = (self.rng.pareto(self.alpha, len(starts)) + 1) * self.min_packets
+            counts = np.ceil(sizes).astype(np.int64)
+            arrivals = np.r_[carried, _burst_arrivals(starts, counts, self.spacing_sec)]
+            arrivals = np.sort(arrivals[arrivals < simulation_time_sec])
+            # Later bursts start at or after 'horizon'
+            ready = np.searchsorted(arrivals, horizon)
+            yield arrivals[:ready], self.packet_size_bytes
+            carried = arrivals[ready:]
+
+class VBRVideoStream(_BlockFlow):
+    """
+    Variable bitrate video with a GOP structure.
+
+    Frames come every 1/fps seconds following the 'gop' pattern (e.g.
+    'IBBPBBPBBPBB'). Mean frame sizes follow 'frame_weights' per frame type,
+    scaled so the average rate is 'bitrate_mbps', with lognormal noise of
+    'size_sigma'. Each frame is split into 'mtu_bytes' packets that
+    arrive together at the frame time.
+    """
+    def __init__(self, flow_id, bitrate_mbps, fps=30, gop='IBBPBBPBBPBB',
+                 frame_weights=None, size_sigma=0.3, mtu_bytes=1200, flow_type='VIDEO', rng=None):
+        super().__init__(flow_id, flow_type, rng)
+        self.bitrate_bps = (bitrate_mbps * 1_000_000) / 8
+        self.fps = fps
+        self.gop = gop
+        self.frame_weights = frame_weights or {'I': 5.0, 'P': 2.0, 'B': 1.0}
+        self.size_sigma = size_sigma
+        self.mtu_bytes = mtu_bytes
+
+    def _blocks(self, simulation_time_sec):
+        frames = max(0, math.ceil(simulation_time_sec * self.fps))
+        weights = np.array([self.frame_weights[t] for t in self.gop])
+        mean_frame_bytes = self.bitrate_bps / self.fps * weights / weights.mean()
+        # About BLOCK packets per block of frames
+        block = max(1, int(self.BLOCK * self.mtu_bytes * self.fps / self.bitrate_bps))
+        for first in range(0, frames, block):
+            frame_index = np.arange(first, min(first + block, frames))
+            frame_times = frame_index / self.fps
+            frame_index = frame_index[frame_times < simulation_time_sec]
+            frame_times = frame_times[frame_times < simulation_time_sec]
+            mean_bytes = mean_frame_bytes[frame_index % len(self.gop)]
+            # Lognormal noise with mean 1
+            noise = np.exp(self.size_sigma * self.rng.standard_normal(len(frame_times))
+                           - self.size_sigma ** 2 / 2)
+            frame_bytes = np.maximum(1, np.rint(mean_bytes * noise)).astype(np.int64)
+
+            counts = -(-frame_bytes // self.mtu_bytes)
+            arrivals = np.repeat(frame_times, counts)
+            sizes = np.full(len(arrivals), self.mtu_bytes, dtype=np.int64)
+            last = np.cumsum(counts) - 1
+            sizes[last] = frame_bytes - (counts - 1) * self.mtu_bytes
+            yield arrivals, sizes
+
+def merge_flows(flows, simulation_time_sec):
+    """
+    K-way merge of the flows' lazy generators, in arrival order.
+
+    heapq.merge only holds the next packet of each flow, so memory is
+    O(number of flows) no matter how long the simulation runs.
+    Flow 'i' in the list gets flow_index 'i'.
+    The result can be passed straight to run_simulation.
+    """
+    streams = [flow.iter_packets(simulation_time_sec, flow_index)
+               for flow_index, flow in enumerate(flows)]
+    return heapq.merge(*streams, key=attrgetter('arrival_time_sec'))
@@ -0,0 +1,166 @@
+# File: flowtable.py
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass(frozen=True)
+class Action:
+    """
+    What to do with a matching packet.
+    queue: queue/class name for the router (None = the packet's flow_type)
+    mark:  value written to packet.mark (0 = leave as is)
+    drop:  discard the packet
+    meter: name of a Meter; packets over its rate are dropped
+    """
+    queue: Optional[str] = None
+    mark: int = 0
+    drop: bool = False
+    meter: Optional[str] = None
+
+@dataclass(frozen=True)
+class Rule:
+    """A match-action entry. None in a match field means "any"."""
+    priority: int
+    action: Action
+    flow_index: Optional[int] = None
+    flow_type: Optional[str] = None
+    min_size: int = 0
+    max_size: Optional[int] = None
+
+    @property
+    def matches_any_size(self):
+        return self.min_size <= 0 and self.max_size is None
+
+    def matches_size(self, size_bytes):
+        return self.min_size <= size_bytes and (self.max_size is None or size_bytes <= self.max_size)
+
+class Meter:
+    """A token bucket of 'rate_bps' bytes/second and 'burst_bytes' depth."""
+    def __init__(self, rate_bps, burst_bytes):
+        self.rate_bps = rate_bps
+        self.burst_bytes = burst_bytes
+        self.tokens = burst_bytes
+        self.last_time = 0.0
+
+    def conforms(self, size_bytes, now):
+        if now > self.last_time:
+            self.tokens = min(self.burst_bytes, self.tokens + (now - self.last_time) * self.rate_bps)
+            self.last_time = now
+        if size_bytes <= self.tokens:
+            self.tokens -= size_bytes
+            return True
+        return False
+
+class _SizeDependent:
+    """
+    Cache entry for a (flow, class) whose rules also look at packet size.
+
+    The rules' size ranges cut the sizes into disjoint intervals (at every
+    min_size and max_size + 1), and each interval maps to the action that
+    wins there. A lookup is one bisect, however many rules there are.
+    """
+    __slots__ = ('starts', 'actions')
+    def __init__(self, rules, default):
+        bounds = {0}
+        for rule in rules:
+            bounds.add(max(0, rule.min_size))
+            if rule.max_size is not None:
+                bounds.add(rule.max_size + 1)
+        starts = sorted(bounds)
+        actions = [default] * len(starts)
+        # Paint from the lowest-priority rule up, so the winner paints last
+        for rule in reversed(rules):
+            low = bisect_right(starts, max(0, rule.min_size)) - 1
+            high = len(starts) if rule.max_size is None else bisect_right(starts, rule.max_size)
+            if high > low:
+                actions[low:high] = [rule.action] * (high - low)
+        # Merge neighbouring intervals with the same action
+        self.starts = [starts[0]]
+        self.actions = [actions[0]]
+        for start, action in zip(starts[1:], actions[1:]):
+            if action is not self.actions[-1]:
+                self.starts.append(start)
+                self.actions.append(action)
+
+    def action_for(self, size_bytes):
+        return self.actions[bisect_right(self.starts, size_bytes) - 1]
+
+class FlowTable:
+    """
+    An SDN-style flow table consulted by the routers.
+
+    Rules are indexed by which match fields they fix:
+      exact      (flow_index, flow_type) -> rules
+      by_flow    flow_index              -> rules (any class)
+      by_type    flow_type               -> rules (any flow)
+      wildcard   rules matching every flow and class
+    A lookup only merges the four short candidate lists for the packet's
+    (flow, class) key, sorted by priority. The result is cached per key,
+    so the steady state is one dict lookup per packet (plus one bisect
+    when size ranges are involved), even with thousands of rules installed.
+    """
+    def __init__(self, default_action=Action()):
+        self.default_action = default_action
+        self.meters = {}
+        self._exact = {}
+        self._by_flow = {}
+        self._by_type = {}
+        self._wildcard = []
+        self._cache = {}
+        self.rule_count = 0
+
+    def install(self, rule):
+        if rule.flow_index is not None and rule.flow_type is not None:
+            bucket = self._exact.setdefault((rule.flow_index, rule.flow_type), [])
+        elif rule.flow_index is not None:
+            bucket = self._by_flow.setdefault(rule.flow_index, [])
+        elif rule.flow_type is not None:
+            bucket = self._by_type.setdefault(rule.flow_type, [])
+        else:
+            bucket = self._wildcard
+        bucket.append(rule)
+        self.rule_count += 1
+        self._cache.clear()
+
+    def add_meter(self, name, rate_bps, burst_bytes):
+        self.meters[name] = Meter(rate_bps, burst_bytes)
+
+    def _compile(self, flow_index, flow_type):
+        """Builds the cache entry for one (flow, class) key."""
+        candidates = (self._exact.get((flow_index, flow_type), []) +
+                      self._by_flow.get(flow_index, []) +
+                      self._by_type.get(flow_type, []) +
+                      self._wildcard)
+        candidates.sort(key=lambda rule: -rule.priority)
+        # Rules below the first size-independent match can never win
+        for i, rule in enumerate(candidates):
+            if rule.matches_any_size:
+                if i == 0:
+                    return rule.action
+                return _SizeDependent(candidates[:i], rule.action)
+        return _SizeDependent(candidates, self.default_action) if candidates else self.default_action
+
+    def lookup(self, packet):
+        """Returns the Action for 'packet'."""
+        key = (packet.flow_index, packet.flow_type)
+        entry = self._cache.get(key)
+        if entry is None:
+            entry = self._cache[key] = self._compile(*key)
+        if entry.__class__ is _SizeDependent:
+            return entry.action_for(packet.size_bytes)
+        return entry
+
+    def apply(self, packet):
+        """
+        Runs the matching action on 'packet'.
+        Returns the queue name to use, or None if the packet is dropped.
+        """
+        action = self.lookup(packet)
+        if action.drop:
+            return None
+        if action.meter is not None and \
+           not self.meters[action.meter].conforms(packet.size_bytes, packet.arrival_time_sec):
+            return None
+        if action.mark:
+            packet.mark = action.mark
+        return action.queue or packet.flow_type
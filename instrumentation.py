@@ -0,0 +1,126 @@
+# File: instrumentation.py
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+
+from router import WFQRouter
+
+class Instrumentation:
+    """
+    Optional visibility into a simulation run.
+
+    Records:
+      - queue occupancy per class, sampled every 'sample_interval_sec'
+        of simulated time (by a TIMER event, not on the packet path)
+      - dequeue decisions (which class was sent, WFQ counter resets and
+        "spare bandwidth" fallbacks)
+      - wall-clock seconds spent in each phase and hot-path call
+
+    Nothing here runs unless you pass it to run_simulation(). The router
+    is switched to an instrumented subclass for the run instead of
+    checking a flag on every packet.
+    """
+    def __init__(self, sample_interval_sec=0.1):
+        self.sample_interval_sec = sample_interval_sec
+        self.seconds = defaultdict(float)  # Phase / call name -> wall-clock seconds
+        self.decisions = Counter()
+        self.queue_samples = []            # (simulated time, {queue: depth})
+
+    @contextmanager
+    def phase(self, name):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += perf_counter() - start
+
+    def timed(self, name, func):
+        """Wraps 'func' so its wall-clock time is added to 'name'."""
+        seconds = self.seconds
+        def wrapper(*args):
+            start = perf_counter()
+            result = func(*args)
+            seconds[name] += perf_counter() - start
+            return result
+        return wrapper
+
+    def attach(self, loop, router):
+        """Instruments 'router' and starts sampling its queues on 'loop'."""
+        instrument_router(router, self)
+        self._sample(loop, router)
+
+    def _sample(self, loop, router):
+        self.queue_samples.append((loop.now, router.queue_depths()))
+        # Only keep ticking while packets are left, otherwise this timer
+        # and any other periodic timer would keep the loop alive forever.
+        if loop.has_work():
+            loop.call_at(loop.now + self.sample_interval_sec, lambda: self._sample(loop, router))
+
+    def report(self):
+        return {
+            'seconds': dict(self.seconds),
+            'decisions': dict(self.decisions),
+            'queue_samples': len(self.queue_samples),
+            'max_queue_depths': self.max_queue_depths(),
+        }
+
+    def max_queue_depths(self):
+        peak = Counter()
+        for _, depths in self.queue_samples:
+            for queue, depth in depths.items():
+                peak[queue] = max(peak[queue], depth)
+        return dict(peak)
+
+# --- Instrumented router subclasses ---
+
+class _InstrumentedRouter:
+    """Mixin placed in front of a Router class to time and count its calls."""
+    def add_packet(self, packet):
+        start = perf_counter()
+        super().add_packet(packet)
+        self._instrumentation.seconds['router.add_packet'] += perf_counter() - start
+
+    def get_next_packet(self):
+        start = perf_counter()
+        packet = super().get_next_packet()
+        instrumentation = self._instrumentation
+        instrumentation.seconds['router.get_next_packet'] += perf_counter() - start
+        instrumentation.decisions[packet.flow_type if packet is not None else 'empty'] += 1
+        return packet
+
+class _InstrumentedWFQRouter(_InstrumentedRouter):
+    """Also infers WFQRouter's round resets and spare-bandwidth fallbacks."""
+    def get_next_packet(self):
+        will_reset = (self.high_priority_queue and self.low_priority_queue and
+                      self.video_counter == 0 and self.download_counter == 0)
+        if will_reset:
+            before = (self.video_weight, self.download_weight)
+        else:
+            before = (self.video_counter, self.download_counter)
+        packet = super().get_next_packet()
+        if will_reset:
+            self._instrumentation.decisions['wfq.counter_reset'] += 1
+        if packet is not None and (self.video_counter, self.download_counter) == before:
+            # Sent without spending credit
+            self._instrumentation.decisions['wfq.spare_bandwidth'] += 1
+        return packet
+
+_instrumented_classes = {}
+
+def instrument_router(router, instrumentation):
+    """Switches 'router' to an instrumented subclass of its own class."""
+    cls = type(router)
+    if cls not in _instrumented_classes:
+        mixin = _InstrumentedWFQRouter if issubclass(cls, WFQRouter) else _InstrumentedRouter
+        _instrumented_classes[cls] = type(f"Instrumented{cls.__name__}", (mixin, cls), {'_base_class': cls})
+    router.__class__ = _instrumented_classes[cls]
+    router._instrumentation = instrumentation
+    return router
+
+def uninstrument_router(router):
+    """Restores the router's original class."""
+    base = getattr(type(router), '_base_class', None)
+    if base is not None:
+        router.__class__ = base
+        del router._instrumentation
+    return router
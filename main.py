@@ -1,6 +1,16 @@
 # File: main.py
-from flow import VideoStream, FileDownload
-from router import FIFORouter, PQRouter, WFQRouter # Import all three
+import os
+
+import numpy as np
+
+from controller import AdaptiveController, ThresholdPolicy
+from events import EventLoop, Link, PacketSource
+from flow import VideoStream, FileDownload, spawn_generators
+from instrumentation import uninstrument_router
+from packet import PacketBatch
+from router import PQRouter, WFQRouter, WF2QRouter # FIFO uses run_fifo_simulation
+from results import ResultWriter
+from simulation import Simulation
 from statistics import StatisticsCollector, plot_results
 
 # --- 1. Simulation Constants ---
@@ -15,93 +25,161 @@ CONGESTION_END = 25
 VIDEO_BITRATE_MBPS = 5
 DOWNLOAD_PACKET_INTERVAL = 0.001 # 12 Mbps download
 
-# --- 2. The Simulation Function (Unchanged) ---
+# Scenario seed: every flow gets its own generator spawned from it
+SEED = 0
+
+# Per-packet results are saved here (re-plot with: python results.py)
+RESULTS_DIR = 'results'
+
+# --- 2. The Simulation Function ---
 
-def run_simulation(router, stats_collector, all_packets, link_bps):
+def run_simulation(router, stats_collector, all_packets, link_bps, instrumentation=None, controllers=(),
+                   recorder=None):
     """
     Runs a single simulation with a given router and stats collector.
-    This is the core discrete-event loop.
+
+    'all_packets' is a PacketBatch (or any iterable of Packets) that is
+    already sorted by arrival time. Packets are materialized one at a time,
+    so only the packets waiting in the router exist as objects.
+    The work is done by the heap-based event loop in events.py.
+
+    Pass an Instrumentation to record queue depths, dequeue decisions
+    and phase timings. Without it the run has no extra per-packet cost.
+    'controllers' (e.g. controller.AdaptiveController) run on timer ticks.
+    'recorder' (a results.ResultWriter) also saves every packet's outcome.
+    Use simulation.Simulation directly to pause, checkpoint or fork a run.
     """
-    link_free_at_time = 0.0
-    packet_index = 0
-    total_packets = len(all_packets)
-
-    while packet_index < total_packets or router.has_packets():
-        
-        # Step A: Fill router's queues
-        while packet_index < total_packets:
-            packet = all_packets[packet_index]
-            if packet.arrival_time_sec <= link_free_at_time:
-                router.add_packet(packet)
-                packet_index += 1
-            else:
-                break
-        
-        # Step B: Get next packet from router
-        packet_to_send = router.get_next_packet()
-
-        if packet_to_send:
-            # Process the packet
-            arrival_time = packet_to_send.arrival_time_sec
-            start_time = max(arrival_time, link_free_at_time)
-            transmit_duration = packet_to_send.size_bytes / link_bps
-            finish_time = start_time + transmit_duration
-            link_free_at_time = finish_time
-            
-            if packet_to_send.flow_type == 'VIDEO':
-                stats_collector.log_video_latency(arrival_time, finish_time)
-        
-        elif packet_index < total_packets:
-            # Queues are empty, jump time
-            link_free_at_time = all_packets[packet_index].arrival_time_sec
-        
-        else:
-            break
+    if instrumentation is None:
+        Simulation(router, stats_collector, all_packets, link_bps, controllers, recorder).run()
+        return
 
-# --- 3. Main Execution (UPDATED) ---
+    loop = EventLoop()
+    on_departure, on_drop = stats_collector.log_departure, stats_collector.log_drop
+    if recorder is not None:
+        on_departure, on_drop = recorder.hooks(stats_collector, link_bps, loop.clock)
+    router.on_drop = on_drop
+    with instrumentation.phase('simulation.setup'):
+        on_departure = instrumentation.timed('statistics', on_departure)
+        link = Link(loop, router, link_bps, on_departure)
+        PacketSource(loop, all_packets, link.receive)
+        for controller in controllers:
+            controller.attach(loop)
+        instrumentation.attach(loop, router)
+    try:
+        with instrumentation.phase('simulation.event_loop'):
+            loop.run()
+    finally:
+        uninstrument_router(router)
 
-if __name__ == "__main__":
-    
-    print("Starting simulation setup...")
-    
-    # Step 1: Create flows (Unchanged)
+def fifo_finish_times(all_packets, link_bps):
+    """
+    Closed-form FIFO departure times for a sorted PacketBatch.
+
+    A FIFO link follows the Lindley recursion
+        finish[i] = max(arrival[i], finish[i-1]) + size[i] / link_bps
+    which unrolls to
+        finish[i] = busy[i] + max(arrival[j] - busy[j-1] for j <= i)
+    where busy[i] is the cumulative transmit time of packets 0..i.
+    That is one cumsum and one running maximum. Shaped packets arrive
+    at the link at their release time (PacketBatch.entry_time_sec).
+    """
+    transmit = all_packets.size_bytes / link_bps
+    busy = np.cumsum(transmit)
+    slack = all_packets.entry_time_sec - (busy - transmit)
+    return busy + np.maximum.accumulate(slack)
+
+def run_fifo_simulation(stats_collector, all_packets, link_bps, recorder=None):
+    """
+    Vectorized equivalent of run_simulation(FIFORouter(), ...).
+    Gives the same latencies (to float tolerance) in a few array ops.
+    """
+    finish = fifo_finish_times(all_packets, link_bps)
+    stats_collector.log_latencies(all_packets.flow_index, all_packets.class_code,
+                                  all_packets.arrival_time_sec, finish)
+    if recorder is not None:
+        recorder.write_columns(all_packets.flow_index, all_packets.class_code, all_packets.size_bytes,
+                               all_packets.arrival_time_sec, finish - all_packets.size_bytes / link_bps,
+                               finish)
+
+def build_traffic(simulation_time_sec, congestion_start, congestion_end, seed=SEED):
+    """
+    Creates the standard video + download scenario and returns it as
+    one PacketBatch sorted by arrival time.
+    The same 'seed' always gives the same trace, in any process.
+    """
+    video_rng, download_rng = spawn_generators(seed, 2)
     video_flow = VideoStream(
         flow_id="video_1",
         bitrate_mbps=VIDEO_BITRATE_MBPS,
-        packet_size_bytes=1200
+        packet_size_bytes=1200,
+        rng=video_rng
     )
     download_flow = FileDownload(
         flow_id="download_1",
-        start_time=CONGESTION_START,
-        end_time=CONGESTION_END,
+        start_time=congestion_start,
+        end_time=congestion_end,
         packet_size_bytes=1500,
-        interval_sec=DOWNLOAD_PACKET_INTERVAL
+        interval_sec=DOWNLOAD_PACKET_INTERVAL,
+        rng=download_rng
     )
+    return PacketBatch.concatenate([
+        video_flow.generate_packets(simulation_time_sec, flow_index=0),
+        download_flow.generate_packets(simulation_time_sec, flow_index=1)
+    ]).sorted()
+
+def result_writer(name, label, order):
+    """A ResultWriter for one router's run under RESULTS_DIR."""
+    return ResultWriter(os.path.join(RESULTS_DIR, name), label=label, order=order,
+                        link_bps=LINK_BANDWIDTH_BPS,
+                        congestion_period=[CONGESTION_START, CONGESTION_END])
+
+# --- 3. Main Execution (UPDATED) ---
+
+if __name__ == "__main__":
     
-    # Step 2: Generate all packets (Unchanged)
-    all_packets = video_flow.generate_packets(SIMULATION_TIME_SEC) + \
-                  download_flow.generate_packets(SIMULATION_TIME_SEC)
-    all_packets.sort(key=lambda p: p.arrival_time_sec)
+    print("Starting simulation setup...")
     
-    print(f"Generated {len(all_packets)} total packets.")
+    # Step 1 + 2: Create flows and generate one sorted columnar batch
+    all_packets = build_traffic(SIMULATION_TIME_SEC, CONGESTION_START, CONGESTION_END)
+    
+    print(f"Generated {len(all_packets)} total packets ({all_packets.nbytes / 1e6:.1f} MB).")
     
     # --- Run Baseline (FIFO) Simulation ---
     print("Running Baseline (FIFO) simulation...")
-    fifo_router = FIFORouter()
-    fifo_stats = StatisticsCollector()
-    run_simulation(fifo_router, fifo_stats, list(all_packets), LINK_BANDWIDTH_BPS)
+    # FIFO has a closed form, so skip the per-packet loop
+    fifo_stats = StatisticsCollector(keep_samples=True)
+    with result_writer('fifo', 'FIFO', 0) as recorder:
+        run_fifo_simulation(fifo_stats, all_packets, LINK_BANDWIDTH_BPS, recorder=recorder)
 
     # --- Run Priority (PQ) Simulation ---
     print("Running Priority Queuing (PQ) simulation...")
     pq_router = PQRouter()
-    pq_stats = StatisticsCollector()
-    run_simulation(pq_router, pq_stats, list(all_packets), LINK_BANDWIDTH_BPS)
+    pq_stats = StatisticsCollector(keep_samples=True)
+    with result_writer('pq', 'PQ', 1) as recorder:
+        run_simulation(pq_router, pq_stats, all_packets, LINK_BANDWIDTH_BPS, recorder=recorder)
     
     # --- Run Weighted Fair Queuing (WFQ) Simulation ---
     print("Running Weighted Fair Queuing (WFQ) simulation...")
     wfq_router = WFQRouter(video_weight=7, download_weight=3) # We can pass in weights!
-    wfq_stats = StatisticsCollector()
-    run_simulation(wfq_router, wfq_stats, list(all_packets), LINK_BANDWIDTH_BPS)
+    wfq_stats = StatisticsCollector(keep_samples=True)
+    with result_writer('wfq', 'WFQ', 2) as recorder:
+        run_simulation(wfq_router, wfq_stats, all_packets, LINK_BANDWIDTH_BPS, recorder=recorder)
+    
+    # --- Run byte-accurate WF2Q+ Simulation ---
+    print("Running byte-accurate WF2Q+ simulation...")
+    wf2q_router = WF2QRouter(weights={'VIDEO': 7, 'DOWNLOAD': 3})
+    wf2q_stats = StatisticsCollector(keep_samples=True)
+    with result_writer('wf2q', 'WF2Q+', 3) as recorder:
+        run_simulation(wf2q_router, wf2q_stats, all_packets, LINK_BANDWIDTH_BPS, recorder=recorder)
+    
+    # --- Run Adaptive-ML (WF2Q+ retuned on a control tick) Simulation ---
+    print("Running Adaptive-ML (adaptive WF2Q+) simulation...")
+    adaptive_router = WF2QRouter(weights={'VIDEO': 7, 'DOWNLOAD': 3})
+    adaptive_stats = StatisticsCollector(keep_samples=True)
+    adaptive_controller = AdaptiveController(adaptive_router, adaptive_stats, ThresholdPolicy())
+    with result_writer('adaptive', 'Adaptive-ML', 4) as recorder:
+        run_simulation(adaptive_router, adaptive_stats, all_packets, LINK_BANDWIDTH_BPS,
+                       controllers=[adaptive_controller], recorder=recorder)
     
     # --- Plot Results ---
     print("Generating plot...")
@@ -109,7 +187,9 @@ if __name__ == "__main__":
         [
             ('FIFO', fifo_stats),
             ('PQ', pq_stats),
-            ('WFQ', wfq_stats)
+            ('WFQ', wfq_stats),
+            ('WF2Q+', wf2q_stats),
+            ('Adaptive-ML', adaptive_stats)
         ],
         (CONGESTION_START, CONGESTION_END)
     )
@@ -1,14 +1,204 @@
 # File: packet.py
 from dataclasses import dataclass
+from itertools import repeat
+
+import numpy as np
+
+# Integer codes stored in PacketBatch.class_code.
+# CLASS_NAMES maps a code back to the 'flow_type' string the routers use.
+CLASS_VIDEO = 0
+CLASS_DOWNLOAD = 1
+CLASS_NAMES = ('VIDEO', 'DOWNLOAD')
+CLASS_CODES = {name: code for code, name in enumerate(CLASS_NAMES)}
+_CLASS_NAME_ARRAY = np.array(CLASS_NAMES, dtype=object)
 
 @dataclass
 class Packet:
     """
     A simple data class to represent a network packet.
-    
+
     Using @dataclass automatically creates __init__, __repr__, etc.
     """
-    id: str         # A unique ID for the packet
+    id: int         # Row index of the packet in its PacketBatch
     flow_type: str  # 'VIDEO' or 'DOWNLOAD'
     size_bytes: int
-    arrival_time_sec: float
\ No newline at end of file
+    arrival_time_sec: float
+    flow_index: int = 0  # Which flow generated this packet
+    mark: int = 0        # Set by a flow table 'mark' action
+    release_time_sec: float = None  # Set by a shaper; None = enters the network on arrival
+
+
+class PacketBatch:
+    """
+    A structure-of-arrays view of many packets.
+
+    Instead of one Packet object per packet we keep NumPy columns:
+    arrival time (float64), size (uint32), flow index (uint32),
+    class code (uint8) and mark (uint8). That is 18 bytes per packet.
+    Packet objects are only created on demand, e.g. while a packet
+    sits in a router queue.
+
+    A shaper adds an optional release time column: the packet enters
+    the network then, while latency is still measured from its arrival.
+    """
+    def __init__(self, arrival_time_sec, size_bytes, flow_index, class_code, mark=None,
+                 release_time_sec=None):
+        self.arrival_time_sec = np.asarray(arrival_time_sec, dtype=np.float64)
+        self.size_bytes = np.asarray(size_bytes, dtype=np.uint32)
+        self.flow_index = np.asarray(flow_index, dtype=np.uint32)
+        self.class_code = np.asarray(class_code, dtype=np.uint8)
+        if mark is None:
+            mark = np.zeros(len(self.arrival_time_sec), dtype=np.uint8)
+        self.mark = np.asarray(mark, dtype=np.uint8)
+        if release_time_sec is not None:
+            release_time_sec = np.asarray(release_time_sec, dtype=np.float64)
+        self.release_time_sec = release_time_sec
+
+    @property
+    def entry_time_sec(self):
+        """When each packet enters the network: its release time if shaped, else its arrival."""
+        return self.arrival_time_sec if self.release_time_sec is None else self.release_time_sec
+
+    @classmethod
+    def from_flow(cls, arrival_time_sec, size_bytes, flow_index, flow_type):
+        """Builds a batch for a single flow, broadcasting the scalar columns."""
+        arrivals = np.asarray(arrival_time_sec, dtype=np.float64)
+        n = len(arrivals)
+        return cls(
+            arrivals,
+            np.broadcast_to(np.asarray(size_bytes, dtype=np.uint32), (n,)).copy(),
+            np.full(n, flow_index, dtype=np.uint32),
+            np.full(n, CLASS_CODES[flow_type], dtype=np.uint8)
+        )
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0), np.empty(0), np.empty(0), np.empty(0))
+
+    @classmethod
+    def concatenate(cls, batches):
+        """Joins several batches (e.g. one per flow) into one unsorted batch."""
+        batches = list(batches)
+        if not batches:
+            return cls.empty()
+        release = None
+        if any(b.release_time_sec is not None for b in batches):
+            release = np.concatenate([b.entry_time_sec for b in batches])
+        return cls(
+            np.concatenate([b.arrival_time_sec for b in batches]),
+            np.concatenate([b.size_bytes for b in batches]),
+            np.concatenate([b.flow_index for b in batches]),
+            np.concatenate([b.class_code for b in batches]),
+            np.concatenate([b.mark for b in batches]),
+            release
+        )
+
+    def sorted(self):
+        """Returns a new batch ordered by entry time (one stable argsort)."""
+        order = np.argsort(self.entry_time_sec, kind='stable')
+        return self.take(order)
+
+    def take(self, index):
+        """Returns a new batch with the selected rows (mask, slice or indices)."""
+        return PacketBatch(
+            self.arrival_time_sec[index],
+            self.size_bytes[index],
+            self.flow_index[index],
+            self.class_code[index],
+            self.mark[index],
+            None if self.release_time_sec is None else self.release_time_sec[index]
+        )
+
+    @property
+    def nbytes(self):
+        release = 0 if self.release_time_sec is None else self.release_time_sec.nbytes
+        return (self.arrival_time_sec.nbytes + self.size_bytes.nbytes +
+                self.flow_index.nbytes + self.class_code.nbytes + self.mark.nbytes + release)
+
+    def __len__(self):
+        return len(self.arrival_time_sec)
+
+    def packet(self, i):
+        """Materializes row 'i' as a Packet object."""
+        return Packet(
+            id=i,
+            flow_type=CLASS_NAMES[self.class_code[i]],
+            size_bytes=int(self.size_bytes[i]),
+            arrival_time_sec=float(self.arrival_time_sec[i]),
+            flow_index=int(self.flow_index[i]),
+            mark=int(self.mark[i]),
+            release_time_sec=None if self.release_time_sec is None else float(self.release_time_sec[i])
+        )
+
+    def slice(self, start, stop):
+        """Rows [start, stop) as a new batch (views, no copy)."""
+        return self.take(slice(start, stop))
+
+    def __iter__(self):
+        return PacketIterator(self)
+
+class PacketIterator:
+    """
+    Yields the rows of a PacketBatch (or any source with len() and
+    slice(start, stop), such as trace.TraceReader) as Packets.
+
+    Rows are converted to Python scalars one chunk at a time, so
+    iterating never holds more than 'chunk_size' packets. Unlike a
+    generator it can be pickled: its state is just the source and the
+    position of the next packet, which is what a checkpoint needs.
+    Packet ids are row numbers plus 'id_offset'.
+    """
+    def __init__(self, source, chunk_size=4096, position=0, id_offset=0):
+        self.source = source
+        self.chunk_size = chunk_size
+        self.id_offset = id_offset
+        self._chunk_end = position
+        self._pending = []          # Rest of the current chunk, last packet first
+
+    @property
+    def position(self):
+        """Row index of the next packet to be returned."""
+        return self._chunk_end - len(self._pending)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._pending:
+            return self._pending.pop()
+        return self._next_chunk()
+
+    def _next_chunk(self):
+        start = self.position
+        if start >= len(self.source):
+            raise StopIteration
+        rows = self.source.slice(start, start + self.chunk_size)
+        release = getattr(rows, 'release_time_sec', None)
+        first_id = self.id_offset + start
+        # map() builds the Packets without a Python-level loop body
+        chunk = list(map(
+            Packet,
+            range(first_id, first_id + len(rows)),
+            _CLASS_NAME_ARRAY[rows.class_code].tolist(),
+            rows.size_bytes.tolist(),
+            rows.arrival_time_sec.tolist(),
+            rows.flow_index.tolist(),
+            rows.mark.tolist(),
+            repeat(None) if release is None else release.tolist()
+        ))
+        self._chunk_end = start + len(chunk)
+        chunk.reverse()
+        self._pending = chunk
+        return chunk.pop()
+
+    def __getstate__(self):
+        # Packets of the current chunk are rebuilt from the source on demand.
+        # An in-memory batch only keeps its unread rows.
+        source, position, id_offset = self.source, self.position, self.id_offset
+        if isinstance(source, PacketBatch):
+            source, position, id_offset = source.slice(position, len(source)), 0, id_offset + position
+        return {'source': source, 'chunk_size': self.chunk_size,
+                'position': position, 'id_offset': id_offset}
+
+    def __setstate__(self, state):
+        self.__init__(state['source'], state['chunk_size'], state['position'], state['id_offset'])
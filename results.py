@@ -0,0 +1,186 @@
+# File: results.py
+import json
+import os
+
+import numpy as np
+
+from packet import CLASS_CODES
+from statistics import StatisticsCollector
+
+# --- On-disk layout ---
+# A result directory holds numbered chunks of packets, each stored as one
+# .npy file per RESULT field (chunk_000000.flow_index.npy, ...), plus an
+# 'index.json' written on close(). Reading a column only touches that
+# column's files. Dropped packets have dropped=True, start=NaN and
+# finish = the time of the drop.
+RESULT = np.dtype([
+    ('flow_index', '<u4'),
+    ('class_code', 'u1'),
+    ('dropped', '?'),
+    ('size_bytes', '<u4'),
+    ('arrival', '<f8'),
+    ('start', '<f8'),
+    ('finish', '<f8'),
+])
+INDEX_FILE = 'index.json'
+
+def _column_path(directory, chunk_name, field):
+    return os.path.join(directory, f'{chunk_name}.{field}.npy')
+
+class ResultWriter:
+    """
+    Writes per-packet results of a run to 'directory' in chunks.
+
+    Rows are buffered and flushed every 'chunk_size' packets, so memory
+    stays bounded however long the run is. Pass it to
+    run_simulation(..., recorder=writer) or run_fifo_simulation.
+    'metadata' (router name, link speed, ...) is saved in the index.
+    """
+    def __init__(self, directory, chunk_size=65536, **metadata):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.metadata = metadata
+        self.chunks = []
+        self.count = 0
+        self._rows = []
+
+    def hooks(self, stats_collector, link_bps, clock):
+        """
+        Returns (on_departure, on_drop) callbacks that log to both
+        'stats_collector' and this writer.
+        """
+        log_departure = stats_collector.log_departure
+        log_drop = stats_collector.log_drop
+        rows = self._rows
+        chunk_size = self.chunk_size
+
+        def on_departure(packet, finish_time):
+            log_departure(packet, finish_time)
+            rows.append((packet.flow_index, CLASS_CODES[packet.flow_type], False, packet.size_bytes,
+                         packet.arrival_time_sec, finish_time - packet.size_bytes / link_bps,
+                         finish_time))
+            if len(rows) >= chunk_size:
+                self.flush()
+
+        def on_drop(packet):
+            log_drop(packet)
+            rows.append((packet.flow_index, CLASS_CODES[packet.flow_type], True, packet.size_bytes,
+                         packet.arrival_time_sec, np.nan, clock()))
+            if len(rows) >= chunk_size:
+                self.flush()
+
+        return on_departure, on_drop
+
+    def _write_chunk(self, columns):
+        name = f'chunk_{len(self.chunks):06d}'
+        for field in RESULT.names:
+            np.save(_column_path(self.directory, name, field), columns[field])
+        self.chunks.append(name)
+        self.count += len(columns['arrival'])
+
+    def flush(self):
+        if self._rows:
+            rows = np.array(self._rows, dtype=RESULT)
+            self._write_chunk({field: rows[field] for field in RESULT.names})
+            self._rows.clear()
+
+    def write_columns(self, flow_index, class_code, size_bytes, arrival, start, finish, dropped=None):
+        """Bulk path for vectorized runs: writes NumPy columns in chunks."""
+        self.flush()
+        for i in range(0, len(arrival), self.chunk_size):
+            rows = slice(i, i + self.chunk_size)
+            n = len(arrival[rows])
+            columns = {'flow_index': flow_index[rows], 'class_code': class_code[rows],
+                       'dropped': np.zeros(n, dtype=bool) if dropped is None else dropped[rows],
+                       'size_bytes': size_bytes[rows], 'arrival': arrival[rows],
+                       'start': start[rows], 'finish': finish[rows]}
+            self._write_chunk({field: np.asarray(columns[field], dtype=RESULT[field])
+                               for field in RESULT.names})
+
+    def close(self):
+        self.flush()
+        index = {'count': self.count, 'chunks': self.chunks, 'columns': list(RESULT.names),
+                 'metadata': self.metadata}
+        with open(os.path.join(self.directory, INDEX_FILE), 'w') as f:
+            json.dump(index, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class ResultStore:
+    """
+    Read side of a result directory.
+
+    Column files are memory-mapped on access, so opening a store is
+    instant and only the columns actually used are read from disk.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, INDEX_FILE)) as f:
+            index = json.load(f)
+        self.count = index['count']
+        self.chunk_names = index['chunks']
+        self.metadata = index['metadata']
+
+    def __len__(self):
+        return self.count
+
+    def _load(self, chunk_name, field):
+        return np.load(_column_path(self.directory, chunk_name, field), mmap_mode='r')
+
+    def chunk(self, i, fields=RESULT.names):
+        """Chunk 'i' as a dict of memory-mapped columns ('fields' only)."""
+        return {field: self._load(self.chunk_names[i], field) for field in fields}
+
+    def chunks(self, fields=RESULT.names):
+        for i in range(len(self.chunk_names)):
+            yield self.chunk(i, fields)
+
+    def column(self, name):
+        """One column over the whole run, as a single in-memory array."""
+        if not self.chunk_names:
+            return np.empty(0, dtype=RESULT[name])
+        return np.concatenate([self._load(chunk_name, name) for chunk_name in self.chunk_names])
+
+    def statistics(self, keep_samples=True):
+        """Rebuilds a StatisticsCollector (e.g. for plot_results) without re-simulating."""
+        stats = StatisticsCollector(keep_samples=keep_samples)
+        for chunk in self.chunks(('flow_index', 'class_code', 'dropped', 'arrival', 'finish')):
+            delivered = ~chunk['dropped']
+            stats.log_latencies(chunk['flow_index'][delivered], chunk['class_code'][delivered],
+                                chunk['arrival'][delivered], chunk['finish'][delivered])
+            dropped_flows = chunk['flow_index'][~delivered]
+            for flow, n in zip(*np.unique(dropped_flows, return_counts=True)):
+                stats.drops[int(flow)] = stats.drops.get(int(flow), 0) + int(n)
+        return stats
+
+def load_results(directory):
+    """
+    Opens every result store under 'directory', keyed by subdirectory name
+    and ordered by the 'order' metadata entry (then by name).
+    """
+    stores = [(name, ResultStore(os.path.join(directory, name)))
+              for name in os.listdir(directory)
+              if os.path.exists(os.path.join(directory, name, INDEX_FILE))]
+    stores.sort(key=lambda item: (item[1].metadata.get('order', 0), item[0]))
+    return dict(stores)
+
+if __name__ == "__main__":
+    import argparse
+    from statistics import plot_results
+
+    parser = argparse.ArgumentParser(description="Re-plot saved simulation results.")
+    parser.add_argument('directory', nargs='?', default='results')
+    parser.add_argument('--output', help="write the plot to this image file instead of a window")
+    args = parser.parse_args()
+    stores = load_results(args.directory)
+    if not stores:
+        raise SystemExit(f"No results found in '{args.directory}'")
+    first = next(iter(stores.values()))
+    congestion = first.metadata.get('congestion_period', (0, 0))
+    plot_results([(store.metadata.get('label', name), store.statistics())
+                  for name, store in stores.items()], congestion, output_path=args.output)
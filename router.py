@@ -1,23 +1,92 @@
 # File: router.py
+import heapq
 from collections import deque
+from operator import attrgetter
+
+from aqm import BoundedQueue
+from events import Sequence
+
+# Default classifier: one queue per 'flow_type' ('VIDEO', 'DOWNLOAD', ...)
+by_flow_type = attrgetter('flow_type')
+# Per-flow queueing: one queue per flow_index (weights are keyed by flow_index)
+by_flow_index = attrgetter('flow_index')
+
+def _no_clock():
+    return 0.0
 
 class Router:
-    """Base class (template) for a router."""
-    def __init__(self):
-        pass
+    """
+    Base class (template) for a router.
+
+    An optional FlowTable (see flowtable.py) replaces the built-in
+    classification: it picks the queue, marks, meters or drops packets.
+    An optional QueuePolicy (see aqm.py: TailDrop, RED, CoDel) bounds
+    every queue; without one the queues are unbounded deques.
+    'dropped' counts the packets the router discarded, and 'on_drop'
+    (if set, e.g. to StatisticsCollector.log_drop) is told about each one.
+    'clock' returns the current simulated time; a Link sets it.
+    """
+    def __init__(self, flow_table=None, aqm=None):
+        self.flow_table = flow_table
+        self.aqm = aqm
+        self.dropped = 0
+        self.on_drop = None
+        self.clock = _no_clock
+        self._idle_policies = {}     # key -> (expiry, AQM policy) of a reclaimed queue
+        self._policy_expiry = []     # (expiry, seq, key): when that state stops mattering
+        self._policy_sequence = Sequence()
+    def _new_queue(self, key=None):
+        if self.aqm is None:
+            return deque()
+        idle = self._idle_policies.pop(key, None) if key is not None else None
+        return BoundedQueue(self.aqm.clone() if idle is None else idle[1], self)
+    def _release_queue(self, key):
+        """
+        Deletes the emptied queue of 'key'. Its AQM policy is kept aside
+        only while its state still matters (QueuePolicy.release), so a
+        flow that comes back soon continues where it left off and memory
+        only holds recently active flows.
+        """
+        queue = self.queues.pop(key)
+        if self.aqm is None:
+            return
+        now = self.clock()
+        expiry = self._policy_expiry
+        until = queue.policy.release(now)
+        if until > now:
+            self._idle_policies[key] = (until, queue.policy)
+            heapq.heappush(expiry, (until, next(self._policy_sequence), key))
+        while expiry and expiry[0][0] <= now:
+            until, _, old_key = heapq.heappop(expiry)
+            # Skip entries of policies that were reused and released again
+            idle = self._idle_policies.get(old_key)
+            if idle is not None and idle[0] == until:
+                del self._idle_policies[old_key]
+    def _drop(self, packet, queued=False):
+        """'queued' is True when the packet was already counted as waiting."""
+        self.dropped += 1
+        if self.on_drop is not None:
+            self.on_drop(packet)
     def add_packet(self, packet):
         raise NotImplementedError
     def get_next_packet(self):
         raise NotImplementedError
     def has_packets(self):
         raise NotImplementedError
+    def queue_depths(self):
+        """Packets waiting per queue, as {queue name: count}."""
+        raise NotImplementedError
 
 class FIFORouter(Router):
     """A simple First-In, First-Out router."""
-    def __init__(self):
-        super().__init__()
-        self.queue = deque()
+    def __init__(self, flow_table=None, aqm=None):
+        super().__init__(flow_table, aqm)
+        self.queue = self._new_queue()
     def add_packet(self, packet):
+        # One queue, so the flow table can only mark, meter or drop
+        if self.flow_table is not None and self.flow_table.apply(packet) is None:
+            self._drop(packet)
+            return
         self.queue.append(packet)
     def get_next_packet(self):
         if not self.queue:
@@ -25,6 +94,8 @@ class FIFORouter(Router):
         return self.queue.popleft()
     def has_packets(self):
         return len(self.queue) > 0
+    def queue_depths(self):
+        return {'ALL': len(self.queue)}
 
 # --- RENAMED THIS CLASS ---
 class PQRouter(Router):
@@ -32,12 +103,15 @@ class PQRouter(Router):
     A router with two priority queues (PQ).
     This was our original 'QoSRouter'.
     """
-    def __init__(self):
-        super().__init__()
-        self.high_priority_queue = deque()
-        self.low_priority_queue = deque()
+    def __init__(self, flow_table=None, aqm=None):
+        super().__init__(flow_table, aqm)
+        self.high_priority_queue = self._new_queue()
+        self.low_priority_queue = self._new_queue()
     def add_packet(self, packet):
-        if packet.flow_type == 'VIDEO':
+        queue = packet.flow_type if self.flow_table is None else self.flow_table.apply(packet)
+        if queue is None:
+            self._drop(packet)
+        elif queue == 'VIDEO':
             self.high_priority_queue.append(packet)
         else:
             self.low_priority_queue.append(packet)
@@ -49,6 +123,8 @@ class PQRouter(Router):
         return None
     def has_packets(self):
         return len(self.high_priority_queue) > 0 or len(self.low_priority_queue) > 0
+    def queue_depths(self):
+        return {'VIDEO': len(self.high_priority_queue), 'DOWNLOAD': len(self.low_priority_queue)}
 
 # --- NEW CLASS FOR WFQ ---
 class WFQRouter(Router):
@@ -56,10 +132,10 @@ class WFQRouter(Router):
     A router that implements Weighted Fair Queuing (WFQ)
     using a simple Weighted Round Robin (WRR) packet scheduler.
     """
-    def __init__(self, video_weight=7, download_weight=3):
-        super().__init__()
-        self.high_priority_queue = deque()
-        self.low_priority_queue = deque()
+    def __init__(self, video_weight=7, download_weight=3, flow_table=None, aqm=None):
+        super().__init__(flow_table, aqm)
+        self.high_priority_queue = self._new_queue()
+        self.low_priority_queue = self._new_queue()
         
         # Store the "master" weights
         self.video_weight = video_weight
@@ -71,7 +147,10 @@ class WFQRouter(Router):
 
     def add_packet(self, packet):
         # Same logic as PQ: separate traffic into queues
-        if packet.flow_type == 'VIDEO':
+        queue = packet.flow_type if self.flow_table is None else self.flow_table.apply(packet)
+        if queue is None:
+            self._drop(packet)
+        elif queue == 'VIDEO':
             self.high_priority_queue.append(packet)
         else:
             self.low_priority_queue.append(packet)
@@ -109,4 +188,243 @@ class WFQRouter(Router):
         return None # Both queues are empty
 
     def has_packets(self):
-        return len(self.high_priority_queue) > 0 or len(self.low_priority_queue) > 0
\ No newline at end of file
+        return len(self.high_priority_queue) > 0 or len(self.low_priority_queue) > 0
+    def queue_depths(self):
+        return {'VIDEO': len(self.high_priority_queue), 'DOWNLOAD': len(self.low_priority_queue)}
+
+    def set_weight(self, key, weight):
+        """Changes a weight live ('VIDEO' or 'DOWNLOAD'); takes effect this round."""
+        weight = max(1, int(round(weight)))
+        if key == 'VIDEO':
+            self.video_weight = weight
+            self.video_counter = min(self.video_counter, weight)
+        else:
+            self.download_weight = weight
+            self.download_counter = min(self.download_counter, weight)
+
+# --- BYTE-ACCURATE WFQ ---
+class WF2QRouter(Router):
+    """
+    A true virtual-time Weighted Fair Queuing router (WF2Q+).
+
+    Unlike WFQRouter this shares bandwidth by *bytes*, over any number of
+    classes. 'weights' maps a class key (by default packet.flow_type) to
+    its weight; unknown keys get 'default_weight'. A key of None from
+    'classify' (or a flow_table drop) discards the packet.
+
+    Each backlogged class has a virtual start and finish tag for its head
+    packet. A class is eligible once its start tag <= the virtual time,
+    and we send the eligible class with the smallest finish tag.
+    Two heaps (waiting by start, eligible by finish) make each
+    decision O(log n) in the number of backlogged classes.
+
+    With classify=by_flow_index every flow gets its own queue. Queues
+    exist only while backlogged: an emptied queue is deleted at once,
+    and its finish tag is kept only until the virtual time passes it
+    (after that it no longer affects the flow's next start tag). So
+    memory follows the active flows, not every flow ever seen.
+    """
+    def __init__(self, weights=None, default_weight=1, classify=by_flow_type, flow_table=None, aqm=None):
+        super().__init__(flow_table, aqm)
+        if flow_table is not None:
+            classify = flow_table.apply
+        self.weights = dict(weights) if weights else {'VIDEO': 7, 'DOWNLOAD': 3}
+        self.default_weight = default_weight
+        self.classify = classify
+        self.queues = {}
+        self.finish_tags = {}    # Finish tag of the last packet of each class
+        self.virtual_time = 0.0
+        self.active_weight = 0   # Sum of weights of backlogged classes
+        self.packet_count = 0
+        self._waiting = []       # (start, seq, finish, key): not yet eligible
+        self._eligible = []      # (finish, seq, start, key)
+        self._idle = []          # (finish, key): idle classes whose tag is still ahead of V
+        self._sequence = Sequence()
+
+    def weight_of(self, key):
+        return self.weights.get(key, self.default_weight)
+
+    def set_weight(self, key, weight):
+        """Changes a class weight live. Packets already tagged keep their tags."""
+        queue = self.queues.get(key)
+        if queue:
+            self.active_weight += weight - self.weight_of(key)
+        self.weights[key] = weight
+
+    def _schedule_head(self, key, start, size_bytes):
+        finish = start + size_bytes / self.weight_of(key)
+        self.finish_tags[key] = finish
+        if start <= self.virtual_time:
+            heapq.heappush(self._eligible, (finish, next(self._sequence), start, key))
+        else:
+            heapq.heappush(self._waiting, (start, next(self._sequence), finish, key))
+
+    def add_packet(self, packet):
+        key = self.classify(packet)
+        if key is None:
+            self._drop(packet)
+            return
+        queue = self.queues.get(key)
+        if queue is None:
+            queue = self.queues[key] = self._new_queue(key)
+        waiting = len(queue)
+        queue.append(packet)
+        if len(queue) == waiting:
+            # Refused by the queue's AQM policy
+            if not queue:
+                self._release_queue(key)
+            return
+        self.packet_count += 1
+        if len(queue) == 1:
+            # Class just became backlogged
+            self.active_weight += self.weight_of(key)
+            start = max(self.virtual_time, self.finish_tags.get(key, 0.0))
+            self._schedule_head(key, start, packet.size_bytes)
+
+    def get_next_packet(self):
+        if not self.packet_count:
+            return None
+
+        waiting, eligible = self._waiting, self._eligible
+        if not eligible and waiting[0][0] > self.virtual_time:
+            # Nobody is eligible yet: jump to the smallest start tag
+            self.virtual_time = waiting[0][0]
+        while waiting and waiting[0][0] <= self.virtual_time:
+            start, seq, finish, key = heapq.heappop(waiting)
+            heapq.heappush(eligible, (finish, seq, start, key))
+
+        finish, _, start, key = heapq.heappop(eligible)
+        queue = self.queues[key]
+        head = queue[0]
+        packet = queue.popleft()
+        self.packet_count -= 1
+        if packet is not head:
+            # The AQM dropped the tagged head: tag the packet actually sent
+            finish = start + packet.size_bytes / self.weight_of(key)
+            self.finish_tags[key] = finish
+
+        # Virtual time advances by the bytes sent per unit of backlogged weight
+        self.virtual_time += packet.size_bytes / self.active_weight
+        if queue:
+            self._schedule_head(key, finish, queue[0].size_bytes)
+            return packet
+        if self.packet_count:
+            self.active_weight -= self.weight_of(key)
+        else:
+            self.active_weight = 0
+        self._reclaim(key, finish)
+        return packet
+
+    def _reclaim(self, key, finish):
+        """Forgets an emptied class, keeping its finish tag only while it is ahead of V."""
+        self._release_queue(key)
+        idle = self._idle
+        if finish > self.virtual_time:
+            heapq.heappush(idle, (finish, key))
+        else:
+            del self.finish_tags[key]
+        while idle and idle[0][0] <= self.virtual_time:
+            old_finish, old_key = heapq.heappop(idle)
+            # Skip classes that came back (they have a newer tag)
+            if old_key not in self.queues and self.finish_tags.get(old_key) == old_finish:
+                del self.finish_tags[old_key]
+
+    def _drop(self, packet, queued=False):
+        if queued:
+            self.packet_count -= 1
+        super()._drop(packet, queued)
+
+    def has_packets(self):
+        return self.packet_count > 0
+
+    def queue_depths(self):
+        return {key: len(queue) for key, queue in self.queues.items()}
+
+# --- DEFICIT ROUND ROBIN ---
+class DRRRouter(Router):
+    """
+    A Deficit Round Robin (DRR) router over any number of classes.
+
+    Each class earns 'quantum_bytes * weight' bytes of credit per round.
+    Only non-empty classes sit in the active list, so the work per packet
+    is O(1) no matter how many classes exist, as long as the quantum is
+    at least the largest packet size.
+
+    With classify=by_flow_index every flow gets its own queue; a queue
+    and its deficit are created on the flow's first packet and deleted
+    as soon as it empties, so only active flows use memory.
+    """
+    def __init__(self, weights=None, default_weight=1, quantum_bytes=1500, classify=by_flow_type,
+                 flow_table=None, aqm=None):
+        super().__init__(flow_table, aqm)
+        if flow_table is not None:
+            classify = flow_table.apply
+        self.weights = dict(weights) if weights else {'VIDEO': 7, 'DOWNLOAD': 3}
+        self.default_weight = default_weight
+        self.quantum_bytes = quantum_bytes
+        self.classify = classify
+        self.queues = {}
+        self.deficits = {}
+        self.active = deque()       # Keys of non-empty classes, in round order
+        self.head_credited = False  # Has active[0] got its quantum this round?
+        self.packet_count = 0
+
+    def add_packet(self, packet):
+        key = self.classify(packet)
+        if key is None:
+            self._drop(packet)
+            return
+        queue = self.queues.get(key)
+        if queue is None:
+            queue = self.queues[key] = self._new_queue(key)
+        waiting = len(queue)
+        queue.append(packet)
+        if len(queue) == waiting:
+            # Refused by the queue's AQM policy
+            if not queue:
+                self._release_queue(key)
+            return
+        self.packet_count += 1
+        if len(queue) == 1:
+            self.deficits[key] = 0
+            self.active.append(key)
+
+    def get_next_packet(self):
+        active = self.active
+        while active:
+            key = active[0]
+            if not self.head_credited:
+                self.deficits[key] += self.quantum_bytes * self.weights.get(key, self.default_weight)
+                self.head_credited = True
+            queue = self.queues[key]
+            if queue[0].size_bytes <= self.deficits[key]:
+                self.packet_count -= 1
+                packet = queue.popleft()
+                # Charge what was sent: the AQM may have dropped the head
+                self.deficits[key] -= packet.size_bytes
+                if not queue:
+                    # Empty classes leave the round, lose their credit and are reclaimed
+                    self._release_queue(key)
+                    del self.deficits[key]
+                    active.popleft()
+                    self.head_credited = False
+                return packet
+            # Not enough credit: move on to the next class
+            active.rotate(-1)
+            self.head_credited = False
+        return None
+
+    def _drop(self, packet, queued=False):
+        if queued:
+            self.packet_count -= 1
+        super()._drop(packet, queued)
+
+    def has_packets(self):
+        return self.packet_count > 0
+
+    def queue_depths(self):
+        return {key: len(queue) for key, queue in self.queues.items()}
+
+    def set_weight(self, key, weight):
+        """Changes a class weight live; used from the next quantum on."""
+        self.weights[key] = weight
@@ -0,0 +1,190 @@
+# File: shaper.py
+import numpy as np
+
+from packet import CLASS_CODES
+
+class TokenBucket:
+    """A traffic contract: 'rate_bps' bytes/second with 'burst_bytes' of burst."""
+    def __init__(self, rate_bps, burst_bytes):
+        self.rate_bps = rate_bps
+        self.burst_bytes = burst_bytes
+
+def _theoretical_arrival_times(arrivals, service, previous_tat=-np.inf):
+    """
+    Token bucket state as GCRA "theoretical arrival times":
+        tat[i] = max(arrival[i], tat[i-1]) + size[i] / rate
+    This is the same Lindley recursion as a FIFO link, so it unrolls into
+    one cumsum and one running maximum.
+    """
+    busy = np.cumsum(service)
+    slack = np.maximum.accumulate(arrivals - (busy - service))
+    return busy + np.maximum(slack, previous_tat)
+
+def _shape(arrivals, sizes, bucket, tat):
+    tats = _theoretical_arrival_times(arrivals, sizes / bucket.rate_bps, tat)
+    return np.maximum(arrivals, tats - bucket.burst_bytes / bucket.rate_bps), tats[-1]
+
+def shape_times(arrivals, sizes, bucket):
+    """
+    Release times of a FIFO token-bucket shaper, fully vectorized.
+    A packet leaves once the bucket holds its tokens:
+        release[i] = max(arrival[i], tat[i] - burst / rate)
+    """
+    return _shape(arrivals, sizes, bucket, -np.inf)[0]
+
+def _police_scalar(arrivals, service, tolerance, tat, conform):
+    """Plain GCRA loop over Python floats; returns the final TAT."""
+    for i, (arrival, cost) in enumerate(zip(arrivals, service)):
+        candidate = max(arrival, tat) + cost
+        if candidate - arrival <= tolerance:
+            tat = candidate
+        else:
+            conform[i] = False
+    return tat
+
+def police_mask(arrivals, sizes, bucket, block=64, dense_run=256):
+    """
+    True for packets that conform to the contract.
+
+    Out-of-contract packets do not take tokens, so each violation changes
+    the state for the packets after it. Conforming stretches are solved
+    a block at a time: assume the whole block conforms and find the
+    first violator with one vectorized pass. Blocks double while the
+    traffic conforms. After a violation, the next 'dense_run' packets go
+    through a tight scalar loop, because one NumPy pass per violation
+    would be slower than that under sustained overload.
+    """
+    return _police(arrivals, sizes, bucket, -np.inf, block, dense_run)[0]
+
+def _police(arrivals, sizes, bucket, tat, block=64, dense_run=256):
+    """police_mask() starting from bucket state 'tat'; returns (mask, final tat)."""
+    n = len(arrivals)
+    conform = np.ones(n, dtype=bool)
+    service = sizes / bucket.rate_bps
+    tolerance = bucket.burst_bytes / bucket.rate_bps
+    i = 0
+    while i < n:
+        j = min(n, i + block)
+        block_tat = _theoretical_arrival_times(arrivals[i:j], service[i:j], tat)
+        violations = np.flatnonzero(block_tat - arrivals[i:j] > tolerance)
+        if violations.size == 0:
+            tat = block_tat[-1]
+            i = j
+            block *= 2
+            continue
+        k = violations[0]
+        if k > 0:
+            tat = block_tat[k - 1]
+        i += k
+        j = min(n, i + dense_run)
+        tat = _police_scalar(arrivals[i:j].tolist(), service[i:j].tolist(),
+                             tolerance, tat, conform[i:j])
+        i = j
+        block = 64
+    return conform, tat
+
+class TrafficConditioner:
+    """
+    A shaping/policing stage that sits in front of any router.
+
+    'buckets' maps a class name ('VIDEO', 'DOWNLOAD', ...) to its
+    TokenBucket; other classes pass through untouched. 'mode' is:
+      'shape'  - delay excess packets until they conform
+      'police' - drop excess packets
+      'mark'   - keep excess packets but set their mark to 'mark_value'
+    apply() works on a whole PacketBatch with NumPy, so conditioning adds
+    no per-packet Python work to the simulation loop. Shaped packets keep
+    their arrival time and get a release time at which they enter the
+    router, so latency still includes the time spent in the shaper.
+
+    Each bucket's state (its GCRA theoretical arrival time) is kept
+    between calls, so a trace can be conditioned chunk by chunk without
+    refilling the burst at every chunk; reset() refills all buckets.
+    """
+    def __init__(self, buckets, mode='police', mark_value=1):
+        if mode not in ('shape', 'police', 'mark'):
+            raise ValueError(f"Unknown mode '{mode}'")
+        self.buckets = buckets
+        self.mode = mode
+        self.mark_value = mark_value
+        self.nonconforming = 0
+        self.tats = {}      # flow_type -> theoretical arrival time of the next packet
+
+    def reset(self):
+        self.tats.clear()
+
+    def apply(self, batch):
+        """Returns a new PacketBatch, sorted by entry time, after conditioning."""
+        entries = batch.entry_time_sec
+        released = None
+        keep = np.ones(len(batch), dtype=bool)
+        mark = batch.mark.copy()
+        for flow_type, bucket in self.buckets.items():
+            rows = np.flatnonzero(batch.class_code == CLASS_CODES[flow_type])
+            if rows.size == 0:
+                continue
+            sizes = batch.size_bytes[rows].astype(np.float64)
+            tat = self.tats.get(flow_type, -np.inf)
+            if self.mode == 'shape':
+                if released is None:
+                    released = entries.copy()
+                released[rows], self.tats[flow_type] = _shape(entries[rows], sizes, bucket, tat)
+                self.nonconforming += int(np.count_nonzero(released[rows] > entries[rows]))
+                continue
+            conform, self.tats[flow_type] = _police(entries[rows], sizes, bucket, tat)
+            excess = rows[~conform]
+            self.nonconforming += excess.size
+            if self.mode == 'police':
+                keep[excess] = False
+            else:
+                mark[excess] = self.mark_value
+
+        if released is None:
+            released = batch.release_time_sec
+        conditioned = type(batch)(batch.arrival_time_sec, batch.size_bytes, batch.flow_index,
+                                  batch.class_code, mark, released)
+        if self.mode == 'shape':
+            return conditioned.sorted()
+        return conditioned.take(keep) if self.mode == 'police' else conditioned
+
+    def apply_stream(self, packets):
+        """
+        Polices or marks an arrival-ordered iterable of Packets lazily.
+        (Shaping reorders packets, so it needs apply() on a batch.)
+        """
+        if self.mode == 'shape':
+            raise ValueError("Shaping needs a PacketBatch; use apply()")
+        tats = self.tats
+        for packet in packets:
+            bucket = self.buckets.get(packet.flow_type)
+            if bucket is None:
+                yield packet
+                continue
+            arrival = packet.release_time_sec
+            if arrival is None:
+                arrival = packet.arrival_time_sec
+            candidate = max(arrival, tats.get(packet.flow_type, -np.inf)) + packet.size_bytes / bucket.rate_bps
+            if candidate - arrival <= bucket.burst_bytes / bucket.rate_bps:
+                tats[packet.flow_type] = candidate
+                yield packet
+                continue
+            self.nonconforming += 1
+            if self.mode == 'mark':
+                packet.mark = self.mark_value
+                yield packet
+
+if __name__ == "__main__":
+    from main import build_traffic, run_simulation
+    from router import FIFORouter
+    from statistics import StatisticsCollector
+
+    all_packets = build_traffic(30, 5, 25, seed=0)
+    for mode in ('police', 'shape'):
+        # Hold the download to 4 Mbps so video fits on the 10 Mbps link
+        conditioner = TrafficConditioner({'DOWNLOAD': TokenBucket(4e6 / 8, 30_000)}, mode=mode)
+        conditioned = conditioner.apply(all_packets)
+        stats = StatisticsCollector()
+        run_simulation(FIFORouter(), stats, conditioned, 10e6 / 8)
+        print(f"{mode}: {conditioner.nonconforming} excess download packets, "
+              f"FIFO video latency {stats.get_average_video_latency():.2f} ms, "
+              f"download latency {stats.summary('DOWNLOAD').mean:.0f} ms")
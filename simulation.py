@@ -0,0 +1,149 @@
+# File: simulation.py
+import pickle
+import zlib
+
+from events import EventLoop, Link, PacketSource
+from statistics import StatisticsCollector
+
+CHECKPOINT_MAGIC = b'SDNCKPT1'
+
+class _StepTee:
+    """Logs each departure/drop to the run's collector and to the current step's."""
+    def __init__(self, total, window):
+        self.total = total
+        self.window = window
+
+    def log_departure(self, packet, finish_time):
+        self.total.log_departure(packet, finish_time)
+        self.window.log_departure(packet, finish_time)
+
+    def log_drop(self, packet):
+        self.total.log_drop(packet)
+        self.window.log_drop(packet)
+
+class Simulation:
+    """
+    A run_simulation() run kept as an object, so it can be paused,
+    saved to disk and resumed or forked.
+
+    The whole state lives in plain objects: the event heap (pending
+    arrivals, the link's next departure, controller ticks), the router's
+    queues and scheduler counters, the packet iterator's position and
+    the statistics. So a checkpoint is one pickle of this object.
+
+    Inputs must be a PacketBatch or trace.TraceReader (a generator such
+    as merge_flows() cannot be saved). A TraceReader is saved as a file
+    reference; a PacketBatch only keeps its unread rows. Runs with a
+    'recorder' or Instrumentation cannot be checkpointed.
+
+    step() and run_for() advance the run in slices and return a fresh
+    StatisticsCollector with only that slice's departures and drops;
+    'stats_collector' keeps the totals. Until the first step() the hooks
+    log straight to 'stats_collector', so plain run()s pay nothing for it.
+    """
+    def __init__(self, router, stats_collector, packets, link_bps, controllers=(), recorder=None):
+        self.router = router
+        self.stats_collector = stats_collector
+        self.link_bps = link_bps
+        self.controllers = list(controllers)
+        self.recorder = recorder
+        self.loop = EventLoop()
+        self._tee = None
+        self.link = Link(self.loop, router, link_bps, None)
+        self._connect(stats_collector)
+        self.source = PacketSource(self.loop, packets, self.link.receive)
+        for controller in self.controllers:
+            controller.attach(self.loop)
+
+    @property
+    def now(self):
+        return self.loop.now
+
+    @property
+    def finished(self):
+        return not self.loop.has_events()
+
+    def _connect(self, sink):
+        """Points the link and router hooks (and the recorder's) at 'sink'."""
+        on_departure, on_drop = sink.log_departure, sink.log_drop
+        if self.recorder is not None:
+            on_departure, on_drop = self.recorder.hooks(sink, self.link_bps, self.loop.clock)
+        self.router.on_drop = on_drop
+        self.link.on_departure = on_departure
+
+    def _new_window(self):
+        return StatisticsCollector(keep_samples=self.stats_collector.keep_samples)
+
+    def run(self, until=None):
+        """Runs to completion, or up to simulated time 'until'; returns the totals."""
+        if self._tee is None:
+            self.loop.run(until)
+        else:
+            self.step(until)
+        return self.stats_collector
+
+    # --- Incremental stepping ---
+
+    def step(self, until=None):
+        """
+        Handles every event up to simulated time 'until' (or to the end)
+        and returns the statistics of just those events. Only the new
+        departures are touched, so stepping costs the same as one run().
+        """
+        if self._tee is None:
+            self._tee = _StepTee(self.stats_collector, self._new_window())
+            self._connect(self._tee)
+        self.loop.run(until)
+        window, self._tee.window = self._tee.window, self._new_window()
+        return window
+
+    def run_for(self, duration_sec):
+        """step() over the next 'duration_sec' of simulated time."""
+        return self.step(self.now + duration_sec)
+
+    # --- Checkpoints ---
+
+    def _dumps(self):
+        if self.recorder is not None:
+            raise ValueError("A simulation with a recorder cannot be checkpointed")
+        return pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def checkpoint(self, path):
+        """Saves the full state to 'path' (compressed pickle)."""
+        with open(path, 'wb') as f:
+            f.write(CHECKPOINT_MAGIC)
+            f.write(zlib.compress(self._dumps()))
+
+    @classmethod
+    def restore(cls, path):
+        """Loads a simulation saved with checkpoint(); call run() to continue it."""
+        with open(path, 'rb') as f:
+            if f.read(len(CHECKPOINT_MAGIC)) != CHECKPOINT_MAGIC:
+                raise ValueError(f"'{path}' is not a simulation checkpoint")
+            return pickle.loads(zlib.decompress(f.read()))
+
+    def fork(self):
+        """An independent copy of the current state, e.g. for a what-if variant."""
+        return pickle.loads(self._dumps())
+
+if __name__ == "__main__":
+    from main import LINK_BANDWIDTH_BPS, build_traffic
+    from router import WF2QRouter
+
+    # Warm up once, then try three video weights from the same mid-run state
+    simulation = Simulation(WF2QRouter(), StatisticsCollector(), build_traffic(30, 5, 25), LINK_BANDWIDTH_BPS)
+    simulation.run(until=10)
+    simulation.checkpoint('warmup.ckpt')
+    for video_weight in (3, 7, 20):
+        variant = Simulation.restore('warmup.ckpt')
+        variant.router.set_weight('VIDEO', video_weight)
+        stats = variant.run()
+        print(f"WF2Q+ video weight {video_weight} from t=10s: "
+              f"avg video latency {stats.get_average_video_latency():.3f} ms")
+
+    # Advance a fresh run in 5 s slices, looking only at each slice
+    simulation = Simulation(WF2QRouter(), StatisticsCollector(), build_traffic(30, 5, 25), LINK_BANDWIDTH_BPS)
+    while not simulation.finished:
+        window = simulation.run_for(5)
+        print(f"t={simulation.now:4.1f}s: avg video latency {window.get_average_video_latency():.3f} ms, "
+              f"{window.total_drops()} drops")
@@ -1,64 +1,301 @@
 # File: statistics.py
-import matplotlib.pyplot as plt
+import math
+from itertools import chain
+
+import numpy as np
+
+from packet import CLASS_NAMES
+
+class LatencySummary:
+    """
+    Constant-memory latency statistics for one flow (values in ms).
+
+    Keeps a running mean/variance (Welford), min/max and a log-bucketed
+    (HDR-style) histogram for percentiles. Buckets are RELATIVE_PRECISION
+    wide in relative terms, so any percentile is accurate to about 1%.
+    """
+    MIN_VALUE_MS = 0.001        # Anything smaller lands in bucket 0
+    RELATIVE_PRECISION = 0.01
+    _LOG_BASE = math.log1p(RELATIVE_PRECISION)
+
+    def __init__(self, flow_type=None):
+        self.flow_type = flow_type
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0           # Sum of squared differences from the mean
+        self.min = math.inf
+        self.max = -math.inf
+        self.buckets = {}       # Bucket index -> count (sparse)
+
+    def _bucket(self, value_ms):
+        if value_ms <= self.MIN_VALUE_MS:
+            return 0
+        return int(math.log(value_ms / self.MIN_VALUE_MS) / self._LOG_BASE) + 1
+
+    def _bucket_value(self, index):
+        # Geometric middle of the bucket
+        if index == 0:
+            return self.MIN_VALUE_MS
+        return self.MIN_VALUE_MS * math.exp((index - 0.5) * self._LOG_BASE)
+
+    def add(self, value_ms):
+        self.count += 1
+        delta = value_ms - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value_ms - self.mean)
+        if value_ms < self.min:
+            self.min = value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+        index = self._bucket(value_ms)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    @classmethod
+    def _bucket_indexes(cls, values_ms):
+        """Vectorized _bucket() for a NumPy array."""
+        scaled = np.maximum(values_ms, cls.MIN_VALUE_MS) / cls.MIN_VALUE_MS
+        indexes = (np.log(scaled) / cls._LOG_BASE).astype(np.int64) + 1
+        indexes[values_ms <= cls.MIN_VALUE_MS] = 0
+        return indexes
+
+    def _merge_moments(self, count, mean, m2, minimum, maximum, buckets):
+        if self.count == 0:
+            # Nothing to combine with: take the batch as it is
+            self.count, self.mean, self.m2, self.min, self.max = count, mean, m2, minimum, maximum
+            self.buckets = buckets
+            return
+        batch = LatencySummary()
+        batch.count = count
+        batch.mean = mean
+        batch.m2 = m2
+        batch.min = minimum
+        batch.max = maximum
+        batch.buckets = buckets
+        self.merge(batch)
+
+    def add_many(self, values_ms):
+        """Adds a NumPy array of values without a Python loop per value."""
+        n = len(values_ms)
+        if n == 0:
+            return
+        mean = float(values_ms.mean())
+        counts = np.bincount(self._bucket_indexes(values_ms))
+        buckets = {index: int(counts[index]) for index in np.flatnonzero(counts).tolist()}
+        self._merge_moments(n, mean, float(((values_ms - mean) ** 2).sum()),
+                            float(values_ms.min()), float(values_ms.max()), buckets)
+
+    def merge(self, other):
+        """Folds another summary into this one (Chan's parallel formula)."""
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        for index, n in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def percentile(self, q):
+        """Approximate q-th percentile (0-100), e.g. 50, 99 or 99.9."""
+        if self.count == 0:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(max(self._bucket_value(index), self.min), self.max)
+        return self.max
 
 class StatisticsCollector:
-    """Collects and plots simulation data."""
-    def __init__(self):
-        self.video_latencies = []
-
-    def log_video_latency(self, arrival_time, finish_time):
-        latency_sec = finish_time - arrival_time
-        latency_ms = latency_sec * 1000
-        self.video_latencies.append((arrival_time, latency_ms))
-        
+    """
+    Collects and plots simulation data.
+
+    Latencies are summarized per flow (by flow index) in constant memory.
+    Pass keep_samples=True to also keep every (arrival, latency) tuple
+    of the video packets, e.g. for scatter plots.
+    """
+    def __init__(self, keep_samples=False):
+        self.keep_samples = keep_samples
+        self.flows = {}              # flow_index -> LatencySummary
+        self.drops = {}              # flow_index -> packets dropped
+        self.class_totals = {}       # flow_type -> [packets, latency sum in ms]
+        self.video_latencies = []    # Only filled when keep_samples=True
+
+    def _summary(self, flow_index, flow_type):
+        summary = self.flows.get(flow_index)
+        if summary is None:
+            summary = self.flows[flow_index] = LatencySummary(flow_type)
+        return summary
+
+    def log_latency(self, flow_index, flow_type, arrival_time, finish_time):
+        latency_ms = (finish_time - arrival_time) * 1000
+        self._summary(flow_index, flow_type).add(latency_ms)
+        totals = self.class_totals.get(flow_type)
+        if totals is None:
+            totals = self.class_totals[flow_type] = [0, 0.0]
+        totals[0] += 1
+        totals[1] += latency_ms
+        if self.keep_samples and flow_type == 'VIDEO':
+            self.video_latencies.append((arrival_time, latency_ms))
+
+    def log_video_latency(self, arrival_time, finish_time, flow_index=0):
+        self.log_latency(flow_index, 'VIDEO', arrival_time, finish_time)
+
+    def log_departure(self, packet, finish_time):
+        """Called by a Link each time it finishes sending a packet."""
+        self.log_latency(packet.flow_index, packet.flow_type, packet.arrival_time_sec, finish_time)
+
+    def log_drop(self, packet):
+        """Set as router.on_drop so queue limits / AQM drops are counted."""
+        self.drops[packet.flow_index] = self.drops.get(packet.flow_index, 0) + 1
+
+    def total_drops(self):
+        return sum(self.drops.values())
+
+    def log_latencies(self, flow_index, class_code, arrival_times, finish_times):
+        """
+        Bulk version of log_latency for NumPy columns (e.g. a PacketBatch).
+
+        One stable sort groups the packets by flow; the per-flow moments
+        (reduceat) and histogram buckets (one np.unique over flow/bucket
+        pairs) are then computed for all flows at once, so the cost does
+        not grow with the number of flows.
+        """
+        if len(flow_index) == 0:
+            return
+        order = np.argsort(flow_index, kind='stable')
+        flows = flow_index[order]
+        latencies_ms = (finish_times[order] - arrival_times[order]) * 1000
+        flow_ids, starts, counts = np.unique(flows, return_index=True, return_counts=True)
+        group = np.repeat(np.arange(len(flow_ids)), counts)
+        means = np.add.reduceat(latencies_ms, starts) / counts
+        m2s = np.add.reduceat((latencies_ms - means[group]) ** 2, starts)
+        mins = np.minimum.reduceat(latencies_ms, starts)
+        maxs = np.maximum.reduceat(latencies_ms, starts)
+        codes = class_code[order[starts]]
+        types = [CLASS_NAMES[code] for code in codes.tolist()]
+        class_counts = np.bincount(codes, weights=counts)
+        class_sums = np.bincount(codes, weights=means * counts)
+        for code in np.flatnonzero(class_counts).tolist():
+            totals = self.class_totals.setdefault(CLASS_NAMES[code], [0, 0.0])
+            totals[0] += int(class_counts[code])
+            totals[1] += float(class_sums[code])
+
+        indexes = LatencySummary._bucket_indexes(latencies_ms)
+        keys, key_counts = np.unique(group * (int(indexes.max()) + 1) + indexes, return_counts=True)
+        key_group, key_index = np.divmod(keys, int(indexes.max()) + 1)
+        key_bounds = np.searchsorted(key_group, np.arange(len(flow_ids) + 1))
+        key_index, key_counts = key_index.tolist(), key_counts.tolist()
+
+        rows = zip(flow_ids.tolist(), types, counts.tolist(), means.tolist(), m2s.tolist(),
+                   mins.tolist(), maxs.tolist(), key_bounds[:-1].tolist(), key_bounds[1:].tolist())
+        for flow, flow_type, count, mean, m2, minimum, maximum, first, last in rows:
+            buckets = dict(zip(key_index[first:last], key_counts[first:last]))
+            self._summary(flow, flow_type)._merge_moments(count, mean, m2, minimum, maximum, buckets)
+        if self.keep_samples:
+            video = np.isin(group, [i for i, t in enumerate(types) if t == 'VIDEO'])
+            self.video_latencies.extend(
+                zip(arrival_times[order][video].tolist(), latencies_ms[video].tolist()))
+
+    def summary(self, flow_type=None):
+        """Merged LatencySummary over all flows, or over flows of one class."""
+        merged = LatencySummary(flow_type)
+        for summary in self.flows.values():
+            if flow_type is None or summary.flow_type == flow_type:
+                merged.merge(summary)
+        return merged
+
     def get_average_video_latency(self):
-        if not self.video_latencies:
-            return 0.0
-        total_latency = sum(latency for time, latency in self.video_latencies)
-        return total_latency / len(self.video_latencies)
+        return self.summary('VIDEO').mean
+
+def decimate_minmax(x, y, bins):
+    """
+    Min-max decimation: splits the x range into 'bins' equal columns and
+    keeps only the lowest and highest value of each one (drawn at the
+    column centre). At screen resolution the plot looks the same, spikes
+    included, but it has at most 2 * bins points however long the run was.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) <= 2 * bins:
+        return x, y
+    low, high = x.min(), x.max()
+    width = max(high - low, 1e-12) / bins
+    column = ((x - low) / width).astype(np.int64)
+    np.minimum(column, bins - 1, out=column)
+    y_min = np.full(bins, np.inf)
+    y_max = np.full(bins, -np.inf)
+    np.minimum.at(y_min, column, y)
+    np.maximum.at(y_max, column, y)
+    used = np.flatnonzero(np.isfinite(y_min))
+    centres = low + (used + 0.5) * width
+    return np.concatenate([centres, centres]), np.concatenate([y_min[used], y_max[used]])
 
-# --- UPDATED THIS FUNCTION ---
-def plot_results(stats_list, congestion_period):
+def plot_results(stats_list, congestion_period, output_path=None, dpi=100):
     """
     Uses Matplotlib to plot the final results.
     'stats_list' is a list of tuples: [('Label', stats_collector), ...]
+
+    Each series is min-max decimated to one column per horizontal pixel,
+    so rendering time does not grow with the number of packets.
+    With 'output_path' the figure is rendered headless (Agg) straight to
+    that file; otherwise it opens in a window.
     """
-    
-    plt.figure(figsize=(12, 7))
+    if output_path is None:
+        import matplotlib.pyplot as plt
+        fig = plt.figure(figsize=(12, 7), dpi=dpi)
+    else:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=(12, 7), dpi=dpi)
+        FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    bins = int(fig.get_figwidth() * dpi)
     colors = ['red', 'blue', 'green', 'purple', 'orange']
     
     print(f"\n--- Results ---")
     
-    # Track the highest Y-value for a clean plot
-    max_y_seen = 0.0
-    
     for i, (label, stats) in enumerate(stats_list):
         
         # Unzip the data for plotting
-        x_data = [d[0] for d in stats.video_latencies]
-        y_data = [d[1] for d in stats.video_latencies]
+        samples = np.fromiter(chain.from_iterable(stats.video_latencies), np.float64,
+                              2 * len(stats.video_latencies)).reshape(-1, 2)
+        x_data, y_data = decimate_minmax(samples[:, 0], samples[:, 1], bins)
         
-        avg_latency = stats.get_average_video_latency()
+        video = stats.summary('VIDEO')
+        avg_latency = video.mean
         color = colors[i % len(colors)]
         
-        print(f"{label} Average Video Latency: {avg_latency:.2f} ms")
-        
-        plt.scatter(x_data, y_data, 
-                    label=f"{label} - Avg: {avg_latency:.2f} ms", 
-                    color=color, s=5, alpha=0.7)
+        print(f"{label} Average Video Latency: {avg_latency:.2f} ms "
+              f"(p99: {video.percentile(99):.2f} ms, max: {video.max:.2f} ms)")
+        if stats.drops:
+            print(f"{label} Dropped Packets: {stats.total_drops()}")
         
-        if y_data:
-            max_y_seen = max(max_y_seen, max(y_data))
+        ax.scatter(x_data, y_data, 
+                   label=f"{label} - Avg: {avg_latency:.2f} ms", 
+                   color=color, s=5, alpha=0.7)
 
     # Highlight the congestion period
     start, end = congestion_period
-    plt.axvspan(start, end, color='gray', alpha=0.2, label='Network Congestion (Download Active)')
+    ax.axvspan(start, end, color='gray', alpha=0.2, label='Network Congestion (Download Active)')
     
-    plt.title('Dynamic QoS Management for Home Media')
-    plt.xlabel('Simulation Time (seconds)')
-    plt.ylabel('Video Packet Latency (milliseconds)')
-    plt.legend()
-    plt.grid(True)
+    ax.set_title('Dynamic QoS Management for Home Media')
+    ax.set_xlabel('Simulation Time (seconds)')
+    ax.set_ylabel('Video Packet Latency (milliseconds)')
+    ax.legend()
+    ax.grid(True)
     
     # Set Y-limit based on the highest *non-FIFO* spike
     # This keeps the plot readable.
@@ -67,11 +304,16 @@ def plot_results(stats_list, congestion_period):
         # Find max of all *except* the first one (FIFO)
         non_fifo_max = 0
         for label, stats in stats_list[1:]:
-            if stats.video_latencies:
-                non_fifo_max = max(non_fifo_max, max(d[1] for d in stats.video_latencies))
+            video = stats.summary('VIDEO')
+            if video.count:
+                non_fifo_max = max(non_fifo_max, video.max)
         max_y = max(non_fifo_max * 4, 200) # Show 4x the max QoS latency
     
-    plt.ylim(0, max_y)
+    ax.set_ylim(0, max_y)
     
+    if output_path is not None:
+        fig.savefig(output_path)
+        print(f"\nPlot saved to {output_path}")
+        return
     print("\nPlot window is opening...")
-    plt.show()
\ No newline at end of file
+    plt.show()
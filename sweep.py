@@ -0,0 +1,153 @@
+# File: sweep.py
+import argparse
+import csv
+import itertools
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+
+from main import build_traffic, run_simulation, run_fifo_simulation
+from router import PQRouter, WFQRouter, WF2QRouter, DRRRouter
+from statistics import StatisticsCollector
+
+# Routers whose behaviour depends on the (video, download) weights
+WEIGHTED_ROUTERS = ('wfq', 'wf2q', 'drr')
+ROUTERS = ('fifo', 'pq') + WEIGHTED_ROUTERS
+
+@dataclass(frozen=True)
+class Scenario:
+    """One point of a sweep grid."""
+    router: str
+    bandwidth_mbps: float
+    video_weight: int = 7
+    download_weight: int = 3
+    congestion_start: float = 5
+    congestion_end: float = 25
+    simulation_time_sec: float = 30
+    seed: int = 0
+
+    def traffic_key(self):
+        return (self.simulation_time_sec, self.congestion_start, self.congestion_end, self.seed)
+
+def make_router(scenario):
+    weights = {'VIDEO': scenario.video_weight, 'DOWNLOAD': scenario.download_weight}
+    if scenario.router == 'pq':
+        return PQRouter()
+    if scenario.router == 'wfq':
+        return WFQRouter(video_weight=scenario.video_weight, download_weight=scenario.download_weight)
+    if scenario.router == 'wf2q':
+        return WF2QRouter(weights=weights)
+    if scenario.router == 'drr':
+        return DRRRouter(weights=weights)
+    raise ValueError(f"Unknown router '{scenario.router}'")
+
+# --- Worker side ---
+# Each worker process builds the traffic for a traffic key once and keeps
+# it here, so tasks only ship a small Scenario, never a packet list.
+_traffic_cache = {}
+
+def _get_traffic(scenario):
+    key = scenario.traffic_key()
+    if key not in _traffic_cache:
+        _traffic_cache.clear()      # Keep at most one trace per worker
+        # Seeded flow generators => same key gives the same trace in every worker
+        _traffic_cache[key] = build_traffic(
+            scenario.simulation_time_sec, scenario.congestion_start, scenario.congestion_end,
+            seed=scenario.seed)
+    return _traffic_cache[key]
+
+def run_scenario(scenario):
+    """Runs one scenario and returns a flat summary row (a dict)."""
+    all_packets = _get_traffic(scenario)
+    link_bps = (scenario.bandwidth_mbps * 1_000_000) / 8
+    stats = StatisticsCollector()
+    if scenario.router == 'fifo':
+        run_fifo_simulation(stats, all_packets, link_bps)
+    else:
+        run_simulation(make_router(scenario), stats, all_packets, link_bps)
+
+    video = stats.summary('VIDEO')
+    row = asdict(scenario)
+    row['video_packets'] = video.count
+    row['avg_video_latency_ms'] = video.mean
+    row['p99_video_latency_ms'] = video.percentile(99)
+    row['max_video_latency_ms'] = video.max if video.count else 0.0
+    row['dropped_packets'] = stats.total_drops()
+    return row
+
+# --- Driver side ---
+
+def build_grid(routers, bandwidths, weights, congestion_windows, simulation_time_sec=30, seed=0):
+    """
+    Expands the parameter lists into a list of Scenarios.
+    Weights only multiply the grid for routers that use them.
+    """
+    scenarios = []
+    for (start, end), router, bandwidth in itertools.product(congestion_windows, routers, bandwidths):
+        router_weights = weights if router in WEIGHTED_ROUTERS else [(7, 3)]
+        for video_weight, download_weight in router_weights:
+            scenarios.append(Scenario(router, bandwidth, video_weight, download_weight,
+                                      start, end, simulation_time_sec, seed))
+    return scenarios
+
+def run_sweep(scenarios, workers=None):
+    """
+    Fans the scenarios out over a process pool and returns one row per
+    scenario, in the input order.
+    Scenarios are grouped by traffic key so each worker regenerates
+    traffic as rarely as possible.
+    """
+    order = sorted(range(len(scenarios)), key=lambda i: scenarios[i].traffic_key())
+    ordered = [scenarios[i] for i in order]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        rows = list(map(run_scenario, ordered))
+    else:
+        chunksize = max(1, len(ordered) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(run_scenario, ordered, chunksize=chunksize))
+    results = [None] * len(scenarios)
+    for i, row in zip(order, rows):
+        results[i] = row
+    return results
+
+def print_table(rows):
+    columns = ['router', 'bandwidth_mbps', 'video_weight', 'download_weight',
+               'congestion_start', 'congestion_end', 'avg_video_latency_ms', 'p99_video_latency_ms',
+               'max_video_latency_ms']
+    print("  ".join(f"{c:>20}" for c in columns))
+    for row in rows:
+        cells = [f"{row[c]:>20.3f}" if isinstance(row[c], float) else f"{row[c]:>20}" for c in columns]
+        print("  ".join(cells))
+
+def _pair(text):
+    first, second = text.split(':')
+    return float(first), float(second)
+
+def _int_pair(text):
+    first, second = text.split(':')
+    return int(first), int(second)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a grid of QoS scenarios in parallel.")
+    parser.add_argument('--routers', nargs='+', default=list(ROUTERS), choices=ROUTERS)
+    parser.add_argument('--bandwidths', nargs='+', type=float, default=[10], help="Link speeds in Mbps")
+    parser.add_argument('--weights', nargs='+', type=_int_pair, default=[(7, 3)], help="VIDEO:DOWNLOAD weights")
+    parser.add_argument('--congestion', nargs='+', type=_pair, default=[(5, 25)], help="START:END in seconds")
+    parser.add_argument('--time', type=float, default=30, help="Simulation time in seconds")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--csv', help="Also write the summary table to this CSV file")
+    args = parser.parse_args()
+
+    grid = build_grid(args.routers, args.bandwidths, args.weights, args.congestion, args.time, args.seed)
+    print(f"Running {len(grid)} scenarios...", file=sys.stderr)
+    rows = run_sweep(grid, args.workers)
+    print_table(rows)
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
@@ -0,0 +1,12 @@
+# File: tests/conftest.py
+import os
+import sys
+
+# The modules live flat in the repository root; statistics.py shadows the
+# standard library module of the same name, as it does for main.py.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+stdlib_statistics = sys.modules.get('statistics')
+if stdlib_statistics is not None and not getattr(stdlib_statistics, '__file__', '').startswith(ROOT):
+    del sys.modules['statistics']
@@ -0,0 +1,41 @@
+# File: tests/test_aqm.py
+import pytest
+
+from aqm import RED, CoDel, TailDrop
+from main import LINK_BANDWIDTH_BPS, build_traffic, run_simulation
+from router import DRRRouter, FIFORouter, PQRouter, WF2QRouter, WFQRouter, by_flow_index
+from statistics import StatisticsCollector
+
+@pytest.fixture(scope='module')
+def traffic():
+    return build_traffic(8, 2, 6)
+
+ROUTERS = [FIFORouter, PQRouter, WFQRouter, WF2QRouter, DRRRouter,
+           lambda aqm: WF2QRouter(classify=by_flow_index, aqm=aqm),
+           lambda aqm: DRRRouter(classify=by_flow_index, aqm=aqm)]
+POLICIES = [lambda: TailDrop(max_packets=50), lambda: RED(max_packets=200), CoDel]
+
+@pytest.mark.parametrize('make_router', ROUTERS)
+@pytest.mark.parametrize('make_policy', POLICIES)
+def test_every_packet_is_either_sent_or_counted_as_dropped(traffic, make_router, make_policy):
+    router = make_router(aqm=make_policy())
+    stats = StatisticsCollector()
+    run_simulation(router, stats, traffic, LINK_BANDWIDTH_BPS)
+    assert router.dropped > 0
+    assert stats.total_drops() == router.dropped
+    assert stats.summary().count + router.dropped == len(traffic)
+    assert not router.has_packets()
+
+def test_clone_copies_parameters_but_not_state():
+    template = CoDel(target_sec=0.002, interval_sec=0.05, max_packets=10)
+    template.count = 5
+    clone = template.clone()
+    assert clone.parameters() == template.parameters()
+    assert clone.count == 0
+
+def test_red_clones_draw_different_but_reproducible_streams():
+    first, second = RED(seed=3).clone(), RED(seed=3).clone()
+    other = RED(seed=3)
+    other.clone()
+    assert first.rng.random() == second.rng.random()
+    assert first.rng.random() != other.clone().rng.random()
@@ -0,0 +1,43 @@
+# File: tests/test_controller.py
+import numpy as np
+
+from controller import AdaptiveController, ThresholdPolicy, WindowedLatency
+from instrumentation import Instrumentation
+from main import LINK_BANDWIDTH_BPS, build_traffic
+from router import WFQRouter
+from simulation import Simulation
+from statistics import StatisticsCollector
+
+# --- Windowed latency from per-class running totals (user-013) ---
+
+def test_windowed_latency_differences_class_totals():
+    stats = StatisticsCollector()
+    window = WindowedLatency(stats, 'VIDEO')
+    assert window.read() is None
+    stats.log_latency(0, 'VIDEO', 0.0, 0.002)
+    stats.log_latency(1, 'DOWNLOAD', 0.0, 0.050)
+    stats.log_latency(2, 'VIDEO', 0.0, 0.004)
+    assert abs(window.read() - 3.0) < 1e-9
+    assert window.read() is None
+    # The bulk path updates the same totals (class code 0 is VIDEO)
+    stats.log_latencies(np.array([0, 3, 4]), np.array([0, 0, 1]),
+                        np.zeros(3), np.array([0.010, 0.020, 0.500]))
+    assert abs(window.read() - 15.0) < 1e-9
+    count, total_ms = stats.class_totals['VIDEO']
+    summary = stats.summary('VIDEO')
+    assert count == summary.count and abs(total_ms - summary.mean * count) < 1e-9
+
+# --- Periodic timers must not keep each other alive (user-013) ---
+
+def test_two_periodic_timers_stop_with_the_packets():
+    router = WFQRouter()
+    stats = StatisticsCollector()
+    controllers = [AdaptiveController(router, stats, ThresholdPolicy(), interval_sec=0.1),
+                   AdaptiveController(router, stats, ThresholdPolicy(), interval_sec=0.07)]
+    simulation = Simulation(router, stats, build_traffic(1, 0, 1), LINK_BANDWIDTH_BPS, controllers)
+    instrumentation = Instrumentation()
+    instrumentation.attach(simulation.loop, router)
+    simulation.run(until=1000)   # A bounded run, so a regression fails instead of hanging
+    assert simulation.finished
+    assert all(controller.history[-1][0] < 2 for controller in controllers)
+    assert instrumentation.queue_samples[-1][0] < 2
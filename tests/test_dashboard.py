@@ -0,0 +1,24 @@
+# File: tests/test_dashboard.py
+import numpy as np
+
+from qos_advanced_dashboard import _binary_recurrence, simulate
+
+# --- Advanced dashboard scan (user-019) ---
+
+def test_binary_recurrence_matches_loop():
+    rng = np.random.default_rng(3)
+    if_true, if_false = rng.random((2, 5000)) < 0.5
+    for initial in (False, True):
+        expected = [initial]
+        for t, f in zip(if_true, if_false):
+            expected.append(bool(t if expected[-1] else f))
+        assert np.array_equal(_binary_recurrence(if_true, if_false, initial), expected)
+
+def test_adaptive_model_matches_step_loop():
+    results = simulate(seed=11)
+    adaptive = results['Adaptive-ML']
+    congested = adaptive['video_weight'] != 0.6
+    latency = adaptive['latency']
+    for i in range(1, len(latency)):
+        boosted = bool(congested[i] and latency[i - 1] > 4.0)
+        assert (adaptive['video_weight'][i] == 0.95) == boosted
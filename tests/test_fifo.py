@@ -0,0 +1,24 @@
+# File: tests/test_fifo.py
+import numpy as np
+import pytest
+
+from main import LINK_BANDWIDTH_BPS, build_traffic, run_fifo_simulation, run_simulation
+from results import ResultStore, ResultWriter
+from router import FIFORouter
+from statistics import StatisticsCollector
+
+@pytest.fixture(scope='module')
+def traffic():
+    return build_traffic(8, 2, 6)
+
+# --- Closed-form FIFO (user-002) ---
+
+def test_closed_form_fifo_matches_event_loop(traffic, tmp_path):
+    with ResultWriter(tmp_path / 'loop') as recorder:
+        run_simulation(FIFORouter(), StatisticsCollector(), traffic, LINK_BANDWIDTH_BPS, recorder=recorder)
+    with ResultWriter(tmp_path / 'closed') as recorder:
+        run_fifo_simulation(StatisticsCollector(), traffic, LINK_BANDWIDTH_BPS, recorder=recorder)
+    loop, closed = ResultStore(tmp_path / 'loop'), ResultStore(tmp_path / 'closed')
+    # The loop records in departure order, which for FIFO is arrival order
+    assert np.array_equal(loop.column('flow_index'), closed.column('flow_index'))
+    np.testing.assert_allclose(loop.column('finish'), closed.column('finish'), rtol=0, atol=1e-9)
@@ -0,0 +1,35 @@
+# File: tests/test_flow.py
+from itertools import islice
+
+import numpy as np
+import pytest
+
+from flow import OnOffFlow, ParetoBurstFlow, PoissonFlow, VBRVideoStream, merge_flows
+
+# --- Stochastic flows (user-023) ---
+
+def _flows():
+    return [PoissonFlow(0, 3000, 500, rng=1),
+            VBRVideoStream(1, 8, rng=2),
+            OnOffFlow(2, 20, 0.05, 0.1, 1000, rng=3),
+            ParetoBurstFlow(3, 50, 0.01, 800, rng=4)]
+
+@pytest.mark.parametrize('index', range(4))
+def test_iter_packets_matches_generate_packets(index):
+    batch = _flows()[index].generate_packets(10, flow_index=index)
+    packets = list(_flows()[index].iter_packets(10, flow_index=index))
+    assert len(batch) > 0
+    assert np.all(np.diff(batch.arrival_time_sec) >= 0)
+    assert [p.arrival_time_sec for p in packets] == batch.arrival_time_sec.tolist()
+    assert [p.size_bytes for p in packets] == batch.size_bytes.tolist()
+    assert {p.flow_index for p in packets} == {index}
+
+def test_merge_flows_is_lazy():
+    # A year of traffic: only the first blocks are ever generated
+    packets = list(islice(merge_flows(_flows(), 365 * 86400), 1000))
+    assert len(packets) == 1000
+    assert all(a.arrival_time_sec <= b.arrival_time_sec for a, b in zip(packets, packets[1:]))
+
+def test_unknown_flow_type_is_rejected():
+    with pytest.raises(ValueError, match='BULK'):
+        PoissonFlow(0, 100, 1000, flow_type='BULK')
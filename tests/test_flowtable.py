@@ -0,0 +1,49 @@
+# File: tests/test_flowtable.py
+import random
+
+from flowtable import Action, FlowTable, Rule
+from packet import Packet
+
+def _packet(flow_index=0, flow_type='VIDEO', size_bytes=1000):
+    return Packet(0, flow_type, size_bytes, 0.0, flow_index)
+
+def test_highest_priority_match_wins():
+    table = FlowTable()
+    table.install(Rule(1, Action(queue='any')))
+    table.install(Rule(5, Action(queue='video'), flow_type='VIDEO'))
+    table.install(Rule(9, Action(queue='flow 3'), flow_index=3))
+    table.install(Rule(20, Action(drop=True), flow_index=3, flow_type='DOWNLOAD'))
+    assert table.lookup(_packet(0, 'VIDEO')).queue == 'video'
+    assert table.lookup(_packet(0, 'DOWNLOAD')).queue == 'any'
+    assert table.lookup(_packet(3, 'VIDEO')).queue == 'flow 3'
+    assert table.apply(_packet(3, 'DOWNLOAD')) is None
+
+def test_size_ranges_are_inclusive_and_fall_back_to_lower_priorities():
+    table = FlowTable(default_action=Action(queue='default'))
+    table.install(Rule(10, Action(queue='small'), max_size=200))
+    table.install(Rule(8, Action(queue='medium'), min_size=100, max_size=1000))
+    table.install(Rule(5, Action(queue='jumbo'), min_size=1400))
+    queues = [table.lookup(_packet(size_bytes=size)).queue
+              for size in (0, 200, 201, 1000, 1001, 1399, 1400, 9000)]
+    assert queues == ['small', 'small', 'medium', 'medium', 'default', 'default', 'jumbo', 'jumbo']
+
+def _linear_scan(table, packet):
+    candidates = (table._exact.get((packet.flow_index, packet.flow_type), []) +
+                  table._by_flow.get(packet.flow_index, []) +
+                  table._by_type.get(packet.flow_type, []) + table._wildcard)
+    for rule in sorted(candidates, key=lambda rule: -rule.priority):
+        if rule.matches_size(packet.size_bytes):
+            return rule.action
+    return table.default_action
+
+def test_size_intervals_match_a_linear_rule_scan():
+    rng = random.Random(1)
+    table = FlowTable()
+    for i in range(2000):
+        min_size = rng.randint(-10, 1500)
+        table.install(Rule(rng.randint(0, 20), Action(queue=f'q{i}'),
+                           flow_index=rng.choice([None, 0, 1]), flow_type=rng.choice([None, 'VIDEO']),
+                           min_size=min_size, max_size=rng.choice([None, min_size + rng.randint(-5, 400)])))
+    for _ in range(3000):
+        packet = _packet(rng.choice([0, 1, 2]), rng.choice(['VIDEO', 'DOWNLOAD']), rng.randint(0, 1600))
+        assert table.lookup(packet) is _linear_scan(table, packet)
@@ -0,0 +1,23 @@
+# File: tests/test_metrics.py
+import numpy as np
+
+from metrics import JITTER_GAIN, rfc3550_jitter
+
+# --- RFC 3550 jitter (user-020) ---
+
+def test_rfc3550_jitter_matches_reference_loop():
+    rng = np.random.default_rng(5)
+    n = 5000   # Several jitter blocks
+    flow_index = rng.integers(0, 4, n)
+    arrival = np.sort(rng.random(n) * 10)
+    finish = arrival + rng.exponential(0.01, n)
+    expected = np.zeros(n)
+    previous = {}
+    for i in np.lexsort((finish, flow_index)).tolist():
+        flow = int(flow_index[i])
+        transit_ms = (finish[i] - arrival[i]) * 1000
+        if flow in previous:
+            last_transit, jitter = previous[flow]
+            expected[i] = jitter + (abs(transit_ms - last_transit) - jitter) * JITTER_GAIN
+        previous[flow] = (transit_ms, expected[i])
+    np.testing.assert_allclose(rfc3550_jitter(flow_index, arrival, finish), expected, rtol=1e-9, atol=1e-12)
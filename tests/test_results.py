@@ -0,0 +1,39 @@
+# File: tests/test_results.py
+import os
+
+import numpy as np
+
+from packet import Packet
+from results import RESULT, ResultStore, ResultWriter
+from statistics import StatisticsCollector
+
+# --- Columnar result chunks (user-017) ---
+
+def test_hooks_and_bulk_writes_round_trip(tmp_path):
+    stats = StatisticsCollector()
+    with ResultWriter(tmp_path, chunk_size=2, router='test') as writer:
+        on_departure, on_drop = writer.hooks(stats, 8e6, clock=lambda: 3.0)
+        on_departure(Packet(0, 'VIDEO', 1000, 1.0, 4), 2.0)
+        on_drop(Packet(1, 'DOWNLOAD', 500, 1.5, 5))
+        on_departure(Packet(2, 'VIDEO', 1000, 1.2, 4), 2.5)
+        writer.write_columns(np.array([7]), np.array([1]), np.array([64]),
+                             np.array([4.0]), np.array([4.0]), np.array([4.5]))
+    store = ResultStore(tmp_path)
+    assert len(store) == 4 and len(store.chunk_names) == 3
+    assert store.metadata == {'router': 'test'}
+    assert store.column('flow_index').tolist() == [4, 5, 4, 7]
+    assert store.column('dropped').tolist() == [False, True, False, False]
+    np.testing.assert_allclose(store.column('finish'), [2.0, 3.0, 2.5, 4.5])
+    assert store.column('start')[0] == 2.0 - 1000 / 8e6
+    assert all(store.column(field).dtype == RESULT[field] for field in RESULT.names)
+    assert store.statistics().summary().count == 3
+
+def test_column_reads_only_that_columns_files(tmp_path):
+    with ResultWriter(tmp_path, chunk_size=10) as writer:
+        n = 25
+        writer.write_columns(np.arange(n), np.zeros(n), np.full(n, 100), np.arange(n) * 0.1,
+                             np.arange(n) * 0.1, np.arange(n) * 0.1 + 0.01)
+    for name in os.listdir(tmp_path):
+        if name.endswith('.npy') and '.arrival.' not in name:
+            os.remove(tmp_path / name)
+    np.testing.assert_allclose(ResultStore(tmp_path).column('arrival'), np.arange(25) * 0.1)
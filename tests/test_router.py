@@ -0,0 +1,92 @@
+# File: tests/test_router.py
+import pytest
+
+from aqm import RED, CoDel
+from flow import PoissonFlow, spawn_generators
+from main import run_simulation
+from packet import Packet, PacketBatch
+from router import DRRRouter, WF2QRouter, by_flow_index
+from statistics import StatisticsCollector
+
+# --- Per-flow queue reclamation (user-022) ---
+
+@pytest.fixture(scope='module')
+def sparse_flows():
+    rngs = spawn_generators(1, 500)
+    return PacketBatch.concatenate([PoissonFlow(i, 20, 1000, rng=rng).generate_packets(5, i)
+                                    for i, rng in enumerate(rngs)]).sorted()
+
+@pytest.mark.parametrize('router_class', [WF2QRouter, DRRRouter])
+@pytest.mark.parametrize('make_policy', [None, CoDel, RED])
+def test_per_flow_state_is_reclaimed(sparse_flows, router_class, make_policy):
+    router = router_class(classify=by_flow_index, aqm=make_policy and make_policy())
+    stats = StatisticsCollector()
+    run_simulation(router, stats, sparse_flows, 2e6)
+    assert stats.summary().count + router.dropped == len(sparse_flows)
+    assert router.queues == {}
+    # Only policies whose state still matters are kept
+    assert all(until > router.clock() for until, _ in router._idle_policies.values())
+
+def _packet(i, time, flow=0, size=1000):
+    return Packet(i, 'DOWNLOAD', size, time, flow)
+
+def test_reclaimed_queue_keeps_aqm_state_while_it_matters():
+    now = [0.0]
+    router = WF2QRouter(classify=by_flow_index, aqm=CoDel())
+    router.clock = lambda: now[0]
+    router.add_packet(_packet(0, 0.0))
+    policy = router.queues[0].policy
+    policy.count, policy.drop_next = 3, 0.5
+    router.get_next_packet()
+    assert router.queues == {}
+    # Within the CoDel memory window the same policy comes back...
+    now[0] = 1.0
+    router.add_packet(_packet(1, 1.0))
+    assert router.queues[0].policy is policy
+    router.get_next_packet()
+    # ...after it, a fresh clone takes over and the old state is dropped
+    now[0] = 10.0
+    router.add_packet(_packet(2, 10.0, flow=1))
+    router.get_next_packet()
+    assert 0 not in router._idle_policies
+    router.add_packet(_packet(3, 10.0))
+    assert router.queues[0].policy is not policy
+
+def test_red_average_decays_while_the_queue_is_idle():
+    policy = RED(idle_packet_sec=0.001)
+    policy.average = 30.0
+    until = policy.release(0.0)
+    assert until > 0.0
+    policy.admit([], _packet(0, until), until)
+    assert policy.average < 2 * RED.FORGET_AVERAGE
+
+# --- Byte fairness (user-005, user-006) ---
+
+def _backlog(router, count=4000):
+    """Two classes, always backlogged: small video and large download packets."""
+    for i in range(count):
+        router.add_packet(Packet(2 * i, 'VIDEO', 200, 0.0))
+        router.add_packet(Packet(2 * i + 1, 'DOWNLOAD', 1500, 0.0))
+
+def _worst_byte_lag(router, dequeues=2000):
+    """Largest |download bytes - 3 * video bytes| seen while serving."""
+    served = {'VIDEO': 0, 'DOWNLOAD': 0}
+    worst = 0
+    for _ in range(dequeues):
+        packet = router.get_next_packet()
+        served[packet.flow_type] += packet.size_bytes
+        worst = max(worst, abs(served['DOWNLOAD'] - 3 * served['VIDEO']))
+    assert served['VIDEO'] > 0 and served['DOWNLOAD'] > 0
+    return worst
+
+def test_wf2q_shares_bytes_by_weight():
+    router = WF2QRouter(weights={'VIDEO': 1, 'DOWNLOAD': 3})
+    _backlog(router)
+    # WF2Q+ stays within about one packet of the fluid schedule at all times
+    assert _worst_byte_lag(router) <= 1500 + 3 * 200
+
+def test_drr_shares_bytes_by_weight():
+    router = DRRRouter(weights={'VIDEO': 1, 'DOWNLOAD': 3}, quantum_bytes=1500)
+    _backlog(router)
+    # DRR may run up to one round's quantum ahead
+    assert _worst_byte_lag(router) <= 3 * 1500 + 3 * 200
@@ -0,0 +1,29 @@
+# File: tests/test_shaper.py
+import math
+
+import numpy as np
+import pytest
+
+from shaper import TokenBucket, police_mask
+
+# --- GCRA policing (user-015) ---
+
+def _police_reference(arrivals, sizes, bucket):
+    conform = np.ones(len(arrivals), dtype=bool)
+    tat = -math.inf
+    for i, (arrival, size) in enumerate(zip(arrivals.tolist(), sizes.tolist())):
+        candidate = max(arrival, tat) + size / bucket.rate_bps
+        if candidate - arrival <= bucket.burst_bytes / bucket.rate_bps:
+            tat = candidate
+        else:
+            conform[i] = False
+    return conform
+
+@pytest.mark.parametrize('load', [0.5, 1.0, 3.0])
+def test_police_mask_matches_scalar_gcra(load):
+    rng = np.random.default_rng(7)
+    sizes = rng.integers(64, 1500, 20_000).astype(np.float64)
+    bucket = TokenBucket(1e6, 15_000)
+    gaps = rng.exponential(sizes.mean() / bucket.rate_bps / load, len(sizes))
+    arrivals = np.cumsum(gaps)
+    assert np.array_equal(police_mask(arrivals, sizes, bucket), _police_reference(arrivals, sizes, bucket))
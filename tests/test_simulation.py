@@ -0,0 +1,56 @@
+# File: tests/test_simulation.py
+import pytest
+
+from aqm import CoDel
+from main import LINK_BANDWIDTH_BPS, build_traffic
+from router import WF2QRouter
+from simulation import Simulation
+from statistics import StatisticsCollector
+
+@pytest.fixture(scope='module')
+def traffic():
+    return build_traffic(8, 2, 6)
+
+def _new_simulation(traffic):
+    return Simulation(WF2QRouter(aqm=CoDel(max_packets=50)), StatisticsCollector(), traffic, LINK_BANDWIDTH_BPS)
+
+# --- Checkpoint, resume and fork (user-024) ---
+
+def _summary(stats):
+    video = stats.summary('VIDEO')
+    return video.count, video.mean, video.max, stats.total_drops()
+
+def test_resume_and_fork_match_uninterrupted_run(traffic, tmp_path):
+    expected = _summary(_new_simulation(traffic).run())
+    simulation = _new_simulation(traffic)
+    simulation.run(until=4)
+    path = tmp_path / 'run.ckpt'
+    simulation.checkpoint(path)
+    fork = simulation.fork()
+    assert _summary(simulation.run()) == expected
+    assert _summary(fork.run()) == expected
+    assert _summary(Simulation.restore(path).run()) == expected
+
+# --- Incremental stepping (user-025) ---
+
+def test_step_windows_add_up_to_the_totals(traffic):
+    expected = _new_simulation(traffic).run()
+    simulation = _new_simulation(traffic)
+    simulation.run(until=1)   # Before any step() the hooks log to the totals only
+    windows = [simulation.step(2)]
+    while not simulation.finished:
+        windows.append(simulation.run_for(0.5))
+    totals = simulation.stats_collector
+    assert totals.summary().count == expected.summary().count
+    assert totals.total_drops() == expected.total_drops() > 0
+    # run(until=1) went to the totals only, not to any window
+    assert sum(window.summary().count for window in windows) < totals.summary().count
+    # The slices after the first step cover the run exactly once
+    simulation = _new_simulation(traffic)
+    windows = [simulation.step(0.0)]
+    while not simulation.finished:
+        windows.append(simulation.run_for(0.5))
+    assert sum(window.summary().count for window in windows) == expected.summary().count
+    assert sum(window.total_drops() for window in windows) == expected.total_drops()
+    assert sum(window.summary('VIDEO').mean * window.summary('VIDEO').count for window in windows) == \
+        pytest.approx(expected.summary('VIDEO').mean * expected.summary('VIDEO').count)
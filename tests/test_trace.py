@@ -0,0 +1,47 @@
+# File: tests/test_trace.py
+import struct
+
+import numpy as np
+import pytest
+
+from trace import TraceReader, import_pcap
+
+# --- pcap import of out-of-order captures (user-016) ---
+
+def _write_pcap(path, records):
+    """Raw-IP libpcap file of UDP packets; 'records' are (time, source port)."""
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<IHHiIII', 0xA1B2C3D4, 2, 4, 0, 0, 65535, 101))
+        for time, src_port in records:
+            ip = (bytes([0x45, 0, 0, 28]) + bytes(5) + bytes([17, 0, 0]) + bytes([10, 0, 0, 1, 10, 0, 0, 2]) +
+                  struct.pack('>HH', src_port, 80) + bytes(4))
+            seconds = int(time)
+            f.write(struct.pack('<IIII', seconds, round((time - seconds) * 1e6), len(ip), len(ip) + 100))
+            f.write(ip)
+
+def _read_all(path):
+    reader = TraceReader(path)
+    return reader.slice(0, len(reader))
+
+def test_pcap_import_sorts_out_of_order_records(tmp_path):
+    pcap, trace = tmp_path / 'capture.pcap', tmp_path / 'capture.trace'
+    _write_pcap(pcap, [(1000.5, 1), (1000.4, 2), (1000.6, 1)])
+    flows = import_pcap(pcap, trace)
+    batch = _read_all(trace)
+    assert len(flows) == 2
+    np.testing.assert_allclose(batch.arrival_time_sec, [0.0, 0.1, 0.2], atol=1e-6)
+    assert batch.flow_index.tolist() == [1, 0, 0]
+
+# 3000 records in chunks of 256 give one merge pass, chunks of 64 give two
+@pytest.mark.parametrize('chunk_size', [256, 64])
+def test_pcap_import_merges_sorted_chunks(tmp_path, chunk_size):
+    rng = np.random.default_rng(0)
+    times = np.round(1e9 + rng.uniform(0, 5, 3000), 6)
+    times[::10] = times[1::10]   # Ties keep capture order
+    pcap, trace = tmp_path / 'capture.pcap', tmp_path / 'capture.trace'
+    _write_pcap(pcap, [(time, i % 7) for i, time in enumerate(times.tolist())])
+    import_pcap(pcap, trace, chunk_size=chunk_size)
+    batch = _read_all(trace)
+    order = np.argsort(times, kind='stable')
+    np.testing.assert_allclose(batch.arrival_time_sec, times[order] - times.min(), atol=1e-6)
+    assert batch.flow_index.tolist() == (np.arange(len(times)) % 7)[order].tolist()
@@ -0,0 +1,106 @@
+# File: topology.py
+from events import ARRIVAL, EventLoop, Link, PacketSource
+from statistics import StatisticsCollector
+
+_UNROUTED = object()
+
+class NetworkLink(Link):
+    """
+    A Link inside a Topology: a Router, a bandwidth and a propagation delay.
+
+    When a packet finishes sending it is handed, as the same object, to
+    the next link on its flow's path after the propagation delay.
+    'next_hop' maps flow_index -> next NetworkLink (None = last hop).
+    """
+    def __init__(self, topology, name, bandwidth_bps, router, propagation_delay_sec=0.0):
+        super().__init__(topology.loop, router, bandwidth_bps, self._forward)
+        self.topology = topology
+        self.name = name
+        self.propagation_delay_sec = propagation_delay_sec
+        self.next_hop = {}
+        self.default_next_hop = _UNROUTED
+        self.packets_sent = 0
+        self.bytes_sent = 0
+
+    def _forward(self, packet, finish_time):
+        self.packets_sent += 1
+        self.bytes_sent += packet.size_bytes
+        arrival_time = finish_time + self.propagation_delay_sec
+        next_link = self.next_hop.get(packet.flow_index, self.default_next_hop)
+        if next_link is None:
+            # Last hop: record end-to-end latency
+            self.topology.stats_collector.log_latency(
+                packet.flow_index, packet.flow_type, packet.arrival_time_sec, arrival_time)
+        elif next_link is _UNROUTED:
+            raise ValueError(f"Link '{self.name}' has no route for flow {packet.flow_index}")
+        else:
+            self.loop.schedule(arrival_time, ARRIVAL, packet, next_link.receive)
+
+class Topology:
+    """
+    A set of links plus a static path (list of link names) per flow.
+
+    Packets traverse their path hop by hop on one shared event loop, and
+    the end-to-end latency (first arrival to last-hop delivery, including
+    propagation) is logged per flow in 'stats_collector'.
+    """
+    def __init__(self, stats_collector=None):
+        self.loop = EventLoop()
+        self.stats_collector = stats_collector or StatisticsCollector()
+        self.links = {}
+        self.first_hop = {}
+        self.default_first_hop = None
+
+    def add_link(self, name, bandwidth_bps, router, propagation_delay_sec=0.0):
+        if name in self.links:
+            raise ValueError(f"Link '{name}' already exists")
+        link = NetworkLink(self, name, bandwidth_bps, router, propagation_delay_sec)
+        router.on_drop = self.stats_collector.log_drop
+        self.links[name] = link
+        return link
+
+    def _path(self, link_names):
+        if not link_names:
+            raise ValueError("A path needs at least one link")
+        return [self.links[name] for name in link_names]
+
+    def set_route(self, flow_index, link_names):
+        """Sends flow 'flow_index' through the named links, in order."""
+        path = self._path(link_names)
+        self.first_hop[flow_index] = path[0]
+        for link, next_link in zip(path, path[1:] + [None]):
+            link.next_hop[flow_index] = next_link
+
+    def set_default_route(self, link_names):
+        """Path for every flow that has no route of its own."""
+        path = self._path(link_names)
+        self.default_first_hop = path[0]
+        for link, next_link in zip(path, path[1:] + [None]):
+            link.default_next_hop = next_link
+
+    def _ingress(self, packet):
+        link = self.first_hop.get(packet.flow_index, self.default_first_hop)
+        if link is None:
+            raise ValueError(f"No route for flow {packet.flow_index}")
+        link.receive(packet)
+
+    def run(self, all_packets):
+        """Injects an arrival-ordered packet stream and runs to completion."""
+        PacketSource(self.loop, all_packets, self._ingress)
+        self.loop.run()
+        return self.stats_collector
+
+if __name__ == "__main__":
+    from main import build_traffic
+    from router import FIFORouter, WFQRouter
+
+    # Home gateway (10 Mbps, WFQ) -> upstream ISP link (100 Mbps, FIFO)
+    topology = Topology()
+    topology.add_link('gateway', 10e6 / 8, WFQRouter(), propagation_delay_sec=0.0005)
+    topology.add_link('isp', 100e6 / 8, FIFORouter(), propagation_delay_sec=0.010)
+    topology.set_default_route(['gateway', 'isp'])
+
+    stats = topology.run(build_traffic(30, 5, 25))
+    for flow_index, summary in sorted(stats.flows.items()):
+        print(f"Flow {flow_index} ({summary.flow_type}): {summary.count} packets, "
+              f"avg end-to-end {summary.mean:.2f} ms, p99 {summary.percentile(99):.2f} ms")
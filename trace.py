@@ -0,0 +1,294 @@
+# File: trace.py
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from packet import CLASS_CODES, PacketBatch, PacketIterator
+
+# --- On-disk format ---
+# A 32-byte header followed by fixed-size little-endian records:
+#   header: magic (8s) | version (u4) | record size (u4) | count (u8) | reserved (8x)
+#   record: time_sec (f8) | size_bytes (u4) | flow_index (u4) | class_code (u1) | mark (u1)
+# Records are stored in arrival order, so a reader can stream them straight
+# into run_simulation.
+MAGIC = b'SDNTRACE'
+VERSION = 1
+HEADER = struct.Struct('<8sIIQ8x')
+RECORD = np.dtype([
+    ('time_sec', '<f8'),
+    ('size_bytes', '<u4'),
+    ('flow_index', '<u4'),
+    ('class_code', 'u1'),
+    ('mark', 'u1'),
+])
+
+class TraceWriter:
+    """
+    Appends PacketBatches to a binary trace file.
+    The record count in the header is filled in by close().
+    """
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.count = 0
+        self.last_time = -np.inf
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.itemsize, 0))
+
+    def write(self, batch):
+        if len(batch) == 0:
+            return
+        if batch.release_time_sec is not None:
+            raise ValueError("Traces have no release times; write the batch before shaping it")
+        times = batch.arrival_time_sec
+        if times[0] < self.last_time or np.any(np.diff(times) < 0):
+            raise ValueError("Trace records must be written in arrival order")
+        records = np.empty(len(batch), dtype=RECORD)
+        records['time_sec'] = times
+        records['size_bytes'] = batch.size_bytes
+        records['flow_index'] = batch.flow_index
+        records['class_code'] = batch.class_code
+        records['mark'] = batch.mark
+        records.tofile(self.file)
+        self.count += len(batch)
+        self.last_time = times[-1]
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.itemsize, self.count))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def write_trace(path, batch):
+    """Writes one (sorted) PacketBatch as a trace file."""
+    with TraceWriter(path) as writer:
+        writer.write(batch)
+
+class TraceReader:
+    """
+    Memory-maps a trace file and streams it in fixed-size chunks.
+
+    Opening is instant whatever the file size: pages are only read from
+    disk as chunks are converted. Iterating the reader yields Packets,
+    so it can be passed straight to run_simulation.
+    """
+    def __init__(self, path, chunk_size=65536):
+        self.path = path
+        self.chunk_size = chunk_size
+        with open(path, 'rb') as f:
+            magic, version, record_size, count = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"'{path}' is not a packet trace")
+        if version != VERSION or record_size != RECORD.itemsize:
+            raise ValueError(f"Unsupported trace version {version} in '{path}'")
+        self.records = np.memmap(path, dtype=RECORD, mode='r', offset=HEADER.size, shape=(count,))
+
+    def __getstate__(self):
+        # Pickle (e.g. in a checkpoint) as a file reference, not the records
+        return {'path': self.path, 'chunk_size': self.chunk_size}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'], state['chunk_size'])
+
+    def __len__(self):
+        return len(self.records)
+
+    def slice(self, start, stop):
+        """Rows [start, stop) as an in-memory PacketBatch."""
+        rows = self.records[start:stop]
+        return PacketBatch(rows['time_sec'], rows['size_bytes'], rows['flow_index'],
+                           rows['class_code'], rows['mark'])
+
+    def chunks(self, start=0):
+        for chunk_start in range(start, len(self), self.chunk_size):
+            yield self.slice(chunk_start, chunk_start + self.chunk_size)
+
+    def __iter__(self):
+        return PacketIterator(self, self.chunk_size)
+
+# --- pcap import ---
+
+_PCAP_MAGIC = {
+    b'\xd4\xc3\xb2\xa1': ('<', 1e-6), b'\xa1\xb2\xc3\xd4': ('>', 1e-6),
+    b'\x4d\x3c\xb2\xa1': ('<', 1e-9), b'\xa1\xb2\x3c\x4d': ('>', 1e-9),
+}
+_LINK_HEADER = {1: 14, 101: 0, 113: 16}   # Ethernet, raw IP, Linux cooked
+_UDP = 17
+
+def default_classify(protocol, src_port, dst_port, size_bytes):
+    """UDP is treated as real-time media, everything else as bulk data."""
+    return 'VIDEO' if protocol == _UDP else 'DOWNLOAD'
+
+def _flow_key(frame, link_offset):
+    """(src, dst, protocol, src port, dst port) of an IPv4 frame, or None."""
+    ip = frame[link_offset:]
+    if len(ip) < 20 or ip[0] >> 4 != 4:
+        return None
+    header_len = (ip[0] & 0x0F) * 4
+    protocol = ip[9]
+    src_port = dst_port = 0
+    if protocol in (6, _UDP) and len(ip) >= header_len + 4:
+        src_port, dst_port = struct.unpack_from('>HH', ip, header_len)
+    return (ip[12:16], ip[16:20], protocol, src_port, dst_port)
+
+# Capture records are not always in time order (multi-queue NICs, merged
+# captures), so import_pcap sorts each chunk into a temporary "run" file
+# and then merges the runs, at most _MERGE_FAN_IN at a time. A merge
+# reads ahead chunk_size / fan-in records per run, so memory stays about
+# a few chunks, whatever the capture size.
+_SORT_RUN = np.dtype(RECORD.descr + [('order', '<u8')])
+_MERGE_FAN_IN = 16
+
+def _write_run(directory, runs, times, sizes, flow_ids, classes):
+    run = np.empty(len(times), dtype=_SORT_RUN)
+    run['time_sec'] = times
+    run['size_bytes'] = sizes
+    run['flow_index'] = flow_ids
+    run['class_code'] = classes
+    run['mark'] = 0
+    first = runs[-1][1] if runs else 0
+    run['order'] = np.arange(first, first + len(times))
+    run = run[np.argsort(run['time_sec'], kind='stable')]
+    path = os.path.join(directory, f'run_{len(runs):06d}.bin')
+    run.tofile(path)
+    runs.append((path, first + len(times)))
+
+def _merge_blocks(paths, chunk_size):
+    """
+    Yields the records of sorted run files in (time, capture order) order,
+    in blocks of 'chunk_size' (the last one may be shorter).
+
+    Each round emits every buffered record up to the smallest "last
+    buffered key" among the unfinished runs: nothing still on disk can
+    come before it. That run's buffer is emptied and refilled next round.
+    """
+    runs = [np.memmap(path, dtype=_SORT_RUN, mode='r') for path in paths]
+    read_ahead = max(1, chunk_size // len(runs))
+    positions = [0] * len(runs)
+    buffers = [run[:0] for run in runs]
+    output, output_count = [], 0
+    while True:
+        for i, run in enumerate(runs):
+            if len(buffers[i]) == 0 and positions[i] < len(run):
+                buffers[i] = np.array(run[positions[i]:positions[i] + read_ahead])
+                positions[i] += len(buffers[i])
+        pending = [i for i in range(len(runs)) if len(buffers[i])]
+        if not pending:
+            break
+        unfinished = [i for i in pending if positions[i] < len(runs[i])]
+        if unfinished:
+            limit = min((buffers[i][-1]['time_sec'], buffers[i][-1]['order']) for i in unfinished)
+        else:
+            limit = (np.inf, np.iinfo(np.uint64).max)
+        emitted = []
+        for i in pending:
+            buffer = buffers[i]
+            times, order = buffer['time_sec'], buffer['order']
+            ready = int(np.count_nonzero((times < limit[0]) | ((times == limit[0]) & (order <= limit[1]))))
+            emitted.append(buffer[:ready])
+            buffers[i] = buffer[ready:]
+        records = np.concatenate(emitted)
+        output.append(records[np.lexsort((records['order'], records['time_sec']))])
+        output_count += len(records)
+        if output_count >= chunk_size:
+            output = [np.concatenate(output)]
+            while len(output[0]) >= chunk_size:
+                yield output[0][:chunk_size]
+                output[0] = output[0][chunk_size:]
+            output_count = len(output[0])
+    if output_count:
+        yield np.concatenate(output)
+
+def _merge_runs(paths, directory, writer, time_zero, chunk_size):
+    """Merges the sorted run files into 'writer', in passes of _MERGE_FAN_IN runs."""
+    merge_pass = 0
+    while len(paths) > _MERGE_FAN_IN:
+        merged = []
+        for first in range(0, len(paths), _MERGE_FAN_IN):
+            group = paths[first:first + _MERGE_FAN_IN]
+            path = os.path.join(directory, f'merge_{merge_pass:02d}_{len(merged):06d}.bin')
+            with open(path, 'wb') as f:
+                for block in _merge_blocks(group, chunk_size):
+                    block.tofile(f)
+            for old_path in group:
+                os.remove(old_path)
+            merged.append(path)
+        paths = merged
+        merge_pass += 1
+    for records in _merge_blocks(paths, chunk_size):
+        writer.write(PacketBatch(records['time_sec'] - time_zero, records['size_bytes'],
+                                 records['flow_index'], records['class_code']))
+
+def import_pcap(pcap_path, trace_path, classify=default_classify, chunk_size=65536):
+    """
+    Converts a libpcap capture into a trace file.
+
+    Each distinct IPv4 5-tuple becomes a flow index (in order of first
+    appearance); non-IP frames share flow 0xFFFFFFFF. Packet size is the
+    original wire length. Out-of-order records are sorted by timestamp
+    (ties keep capture order) and times are relative to the earliest one.
+    Returns the list of 5-tuples, indexed by flow index.
+    """
+    flows = {}
+    runs = []
+    with open(pcap_path, 'rb') as f, tempfile.TemporaryDirectory() as run_dir:
+        header = f.read(24)
+        if header[:4] not in _PCAP_MAGIC:
+            raise ValueError(f"'{pcap_path}' is not a libpcap file (pcapng is not supported)")
+        endian, tick = _PCAP_MAGIC[header[:4]]
+        link_type = struct.unpack(endian + 'I', header[20:24])[0]
+        if link_type not in _LINK_HEADER:
+            raise ValueError(f"Unsupported pcap link type {link_type}")
+        link_offset = _LINK_HEADER[link_type]
+        record_header = struct.Struct(endian + 'IIII')
+
+        times, sizes, flow_ids, classes = [], [], [], []
+        base_seconds = None     # Keeps the float times small (and precise)
+        time_zero = np.inf
+        while True:
+            raw = f.read(record_header.size)
+            if len(raw) < record_header.size:
+                break
+            seconds, fraction, captured_len, original_len = record_header.unpack(raw)
+            frame = f.read(captured_len)
+            if base_seconds is None:
+                base_seconds = seconds
+            timestamp = (seconds - base_seconds) + fraction * tick
+            time_zero = min(time_zero, timestamp)
+
+            key = _flow_key(frame, link_offset)
+            if key is None:
+                flow_index, flow_type = 0xFFFFFFFF, 'DOWNLOAD'
+            else:
+                flow_index = flows.setdefault(key, len(flows))
+                flow_type = classify(key[2], key[3], key[4], original_len)
+            times.append(timestamp)
+            sizes.append(original_len)
+            flow_ids.append(flow_index)
+            classes.append(CLASS_CODES[flow_type])
+
+            if len(times) == chunk_size:
+                _write_run(run_dir, runs, times, sizes, flow_ids, classes)
+                times, sizes, flow_ids, classes = [], [], [], []
+        if times:
+            _write_run(run_dir, runs, times, sizes, flow_ids, classes)
+        with TraceWriter(trace_path) as writer:
+            if runs:
+                _merge_runs([path for path, _ in runs], run_dir, writer, time_zero, chunk_size)
+    return list(flows)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Convert a pcap capture into a packet trace.")
+    parser.add_argument('pcap')
+    parser.add_argument('trace')
+    args = parser.parse_args()
+    flows = import_pcap(args.pcap, args.trace)
+    print(f"Wrote {len(TraceReader(args.trace))} packets from {len(flows)} flows to {args.trace}")